@@ -2,13 +2,21 @@ from __future__ import annotations
 
 import pandas as pd
 
-from asv_watcher._core.detector import RollingDetector
-from asv_watcher._core.watcher import Watcher
+from asv_watcher._core.cache import read_manifest
+from asv_watcher._core.detector import (
+    PeltDetector,
+    RollingDetector,
+    StreamingDetector,
+)
+from asv_watcher._core.watcher import BASEDIR, Watcher
 
 pd.options.mode.copy_on_write = True
 
-__all__ = ["RollingDetector", "Watcher"]
+__all__ = ["PeltDetector", "RollingDetector", "StreamingDetector", "Watcher"]
 
 
-def git_commit_link(git_hash):
-    print(f"https://github.com/pandas-dev/pandas/commit/{git_hash}")
+def git_commit_link(git_hash, project):
+    manifest = read_manifest(BASEDIR / ".cache" / project)
+    if manifest is None or manifest.get("show_commit_url") is None:
+        raise ValueError(f"No commit URL recorded in the cache of {project}")
+    print(f"{manifest['show_commit_url']}{git_hash}")
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+import pyarrow.parquet as pq
+
+from asv_watcher._core import util
+
+# Columns whose display strings are derived on read rather than stored.
+FORMATTED_COLUMNS = ["time", "pct_change", "abs_change"]
+# Rows per row group of the cached benchmarks. A series spans a few thousand
+# rows, so a filter on one series only reads a row group or two.
+ROW_GROUP_SIZE = 16_384
+# Files and directories written by write_cache; the dataset of the benchmarks
+# is renamed into place, so its directory is new on every write.
+CACHE_FILES = ["benchmarks", "regressions.parquet", "summary.parquet", "manifest.json"]
+
+
+def module_of(name: str) -> str:
+    """Partition of a benchmark in the cache, the first component of its name."""
+    return name.split(".", 1)[0]
+
+
+def write_cache(
+    path: Path,
+    benchmarks: pd.DataFrame,
+    manifest: dict[str, Any] | None = None,
+) -> None:
+    os.makedirs(path, exist_ok=True)
+    regressions = benchmarks[benchmarks.is_regression].drop(
+        columns=FORMATTED_COLUMNS, errors="ignore"
+    )
+    regressions, summary = index_regressions(regressions, strings=False)
+    # Each file is replaced whole, and the manifest last, so that a run that
+    # fails part way does not leave a cache that reads as complete.
+    write_benchmarks(path / "benchmarks", benchmarks)
+    _replace(path / "summary.parquet", summary.to_parquet)
+    _replace(path / "regressions.parquet", regressions.to_parquet)
+    if manifest is not None:
+
+        def write_manifest(manifest_path: Path) -> None:
+            with open(manifest_path, "w") as f:
+                json.dump(manifest, f)
+
+        _replace(path / "manifest.json", write_manifest)
+
+
+def _replace(path: Path, write: Callable[[Path], Any]) -> None:
+    # Write a file next to path, then move it over path in one step.
+    temporary = path.with_name(f".{path.name}.tmp")
+    write(temporary)
+    os.replace(temporary, path)
+
+
+def read_cache(
+    path: Path,
+) -> tuple[pd.DataFrame | None, dict[str, Any] | None]:
+    """Read the benchmarks and manifest written by a previous run.
+
+    Args:
+        path: Cache directory passed to ``write_cache``.
+
+    Returns:
+        The cached benchmarks and manifest. Both are None if either is missing.
+    """
+    if not (path / "benchmarks").exists():
+        return None, None
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None, None
+    benchmarks = read_benchmarks(path / "benchmarks")
+    return benchmarks, manifest
+
+
+def read_manifest(path: Path) -> dict[str, Any] | None:
+    """Read the manifest written by a previous run.
+
+    Args:
+        path: Cache directory passed to ``write_cache``.
+
+    Returns:
+        The manifest, or None if there is none.
+    """
+    if not (path / "manifest.json").exists():
+        return None
+    with open(path / "manifest.json") as f:
+        result = json.load(f)
+    return result
+
+
+def generation(path: Path) -> int:
+    """Version of a cache, which changes whenever the cache is written.
+
+    Only the files written by ``write_cache`` are looked at, each of which is
+    replaced whole, so this is cheap enough to check on every request.
+
+    Args:
+        path: Cache directory passed to ``write_cache``.
+
+    Returns:
+        The latest modification time of the cache's files in nanoseconds, or 0 if
+        there are none.
+    """
+    result = 0
+    for filename in CACHE_FILES:
+        try:
+            result = max(result, os.stat(path / filename).st_mtime_ns)
+        except FileNotFoundError:
+            pass
+    return result
+
+
+def index_regressions(
+    regressions: pd.DataFrame,
+    strings: bool = True,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Group regressions by commit.
+
+    Args:
+        regressions: Rows of the benchmarks that are regressions.
+        strings: Whether to add display strings to the summary.
+
+    Returns:
+        The regressions ordered by git_hash, and a summary of each commit,
+        newest first. The regressions of a commit are the rows from its "start"
+        up to its "stop" in the ordered regressions; "benchmarks" counts the
+        distinct benchmarks among them, however many environments flagged each.
+    """
+    regressions = regressions.sort_values("git_hash", kind="stable")
+    aggregations = {
+        "date": ("date", "first"),
+        "rows": ("git_hash", "size"),
+        "pct_change_max_value": ("pct_change_value", "max"),
+        "abs_change_max_value": ("abs_change_value", "max"),
+        "pct_change_mean_value": ("pct_change_value", "mean"),
+        "abs_change_mean_value": ("abs_change_value", "mean"),
+    }
+    # Benchmarks loaded with a subset of columns are summarized as far as possible.
+    result = regressions.groupby("git_hash", as_index=False).agg(
+        **{k: v for k, v in aggregations.items() if v[0] in regressions}
+    )
+    counts = result.pop("rows")
+    benchmarks = (
+        regressions.index.to_frame(index=False)[["name", "params"]]
+        .assign(git_hash=regressions["git_hash"].to_numpy())
+        .drop_duplicates()
+        .groupby("git_hash")
+        .size()
+    )
+    result.insert(1 + ("date" in result), "benchmarks", benchmarks.to_numpy())
+    result["stop"] = counts.cumsum()
+    result["start"] = result["stop"] - counts
+    if "date" in result:
+        result = result.sort_values(by="date", ascending=False)
+    result = result.set_index("git_hash", drop=False)
+    if strings:
+        result = util.display_strings(result)
+    return regressions, result
+
+
+def write_benchmarks(
+    path: Path, benchmarks: pd.DataFrame, row_group_size: int = ROW_GROUP_SIZE
+) -> None:
+    """Write benchmarks as a parquet dataset partitioned by module.
+
+    Only numeric values are stored; display strings are derived on read. Each
+    partition is sorted by name, params and revision, and string columns are
+    dictionary-encoded. The statistics of the row groups let filters on these
+    columns skip the row groups of other series.
+
+    The dataset is written next to path and then swapped in, so readers see
+    either the old or the new dataset in full.
+
+    Args:
+        path: Directory of the dataset. Any existing dataset is replaced.
+        benchmarks: Benchmarks as returned by ``process_benchmarks``.
+        row_group_size: Maximum number of rows of a row group.
+    """
+    value_columns = [f"{c}_value" for c in FORMATTED_COLUMNS]
+    data = pd.DataFrame(
+        {
+            c: benchmarks[f"{c}_value"] if c in FORMATTED_COLUMNS else benchmarks[c]
+            for c in benchmarks.columns
+            if c not in value_columns
+        }
+    )
+    data = data.reset_index()
+    modules = data["name"].map(module_of)
+
+    temporary = path.with_name(f".{path.name}.tmp")
+    shutil.rmtree(temporary, ignore_errors=True)
+    for module, partition in data.groupby(modules, sort=True):
+        partition_path = temporary / f"module={module}"
+        os.makedirs(partition_path)
+        table = pa.Table.from_pandas(partition, preserve_index=False)
+        pq.write_table(
+            table,
+            partition_path / "part-0.parquet",
+            row_group_size=row_group_size,
+            use_dictionary=["name", "params", "env", "git_hash"],
+            write_statistics=True,
+        )
+
+    # A directory can't replace a non-empty one, so move the old one aside
+    # first; files already opened by readers remain valid until closed.
+    old = path.with_name(f".{path.name}.old")
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        os.rename(path, old)
+    os.rename(temporary, path)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def open_benchmarks(path: Path) -> ds.Dataset:
+    """Open benchmarks written by ``write_benchmarks`` without reading them.
+
+    Files are memory-mapped, so only the pages of the columns and row groups
+    that are scanned are read.
+
+    Args:
+        path: Directory of the dataset.
+
+    Returns:
+        A dataset over the cached benchmarks.
+    """
+    result = ds.dataset(
+        str(Path(path).resolve()),
+        format="parquet",
+        partitioning="hive",
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    return result
+
+
+def read_benchmarks(
+    path: Path | ds.Dataset,
+    modules: list[str] | None = None,
+    columns: list[str] | None = None,
+    expression: ds.Expression | None = None,
+    strings: bool = True,
+) -> pd.DataFrame:
+    """Read benchmarks written by ``write_benchmarks``.
+
+    Args:
+        path: Directory of the dataset, or the dataset returned by
+            ``open_benchmarks``.
+        modules: Only read these modules. Defaults to all modules.
+        columns: Only read these columns, in addition to the index. Defaults to
+            all columns.
+        expression: Only read the rows matching this expression.
+        strings: Whether to add display strings. See ``format_benchmarks``.
+
+    Returns:
+        The benchmarks, in the format returned by ``process_benchmarks``.
+    """
+    dataset = path if isinstance(path, ds.Dataset) else open_benchmarks(path)
+    index = [
+        c for c in ["name", "params", "env", "revision"] if c in dataset.schema.names
+    ]
+    if modules is not None:
+        module_filter = ds.field("module").isin(modules)
+        expression = module_filter if expression is None else expression & module_filter
+    if columns is None:
+        columns = [c for c in dataset.schema.names if c != "module"]
+    columns = list(dict.fromkeys(index + columns))
+    table = dataset.to_table(columns=columns, filter=expression)
+    data = table.to_pandas().set_index(index).sort_index()
+    result = util.format_benchmarks(data, strings)
+    return result
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections import deque
+from types import ModuleType
+from typing import NamedTuple
 
+import numpy as np
 import pandas as pd
 
+numba: ModuleType | None
+try:
+    import numba
+except ImportError:
+    numba = None
+
 
 class Detector(ABC):
     @abstractmethod
@@ -11,14 +21,120 @@ class Detector(ABC):
         raise NotImplementedError
 
 
+def series_keys(data: pd.DataFrame) -> list[str]:
+    """Index levels identifying a series, e.g. name, params and env.
+
+    Args:
+        data: Timings indexed by the series keys followed by revision.
+
+    Returns:
+        The names of all index levels other than revision.
+    """
+    return [name for name in data.index.names if name != "revision"]
+
+
+def _contiguous_series(
+    data: pd.DataFrame,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Make the timings of each series contiguous, keeping their order.
+
+    Args:
+        data: Timings sorted by revision.
+
+    Returns:
+        The positions in data of the reordered rows, their times, and the start
+        and end of each series within them.
+    """
+    codes = data.groupby(series_keys(data), sort=False).ngroup().to_numpy()
+    order = np.argsort(codes, kind="stable")
+    times = data["time"].to_numpy(dtype=float)[order]
+    codes = codes[order]
+    n = len(times)
+    is_start = np.ones(n, dtype=bool)
+    is_start[1:] = codes[1:] != codes[:-1]
+    starts = np.flatnonzero(is_start)
+    ends = np.append(starts[1:], n)
+    return order, times, starts, ends
+
+
+def _restore_order(
+    data: pd.DataFrame, columns: dict[str, np.ndarray], order: np.ndarray
+) -> pd.DataFrame:
+    # Add columns computed over the rows reordered by _contiguous_series.
+    inverse = np.empty(len(order), dtype=np.intp)
+    inverse[order] = np.arange(len(order))
+    for name, values in columns.items():
+        data[name] = values[inverse]
+    return data
+
+
+def tolerances(data: pd.DataFrame, significance: float) -> np.ndarray:
+    """Ratio of the established timings before and after a regression.
+
+    A shift is a regression when the timings before it are below the tolerance
+    times those after it. The tolerance is 0.95, unless the series is noisy: with
+    a "spread" column, the typical spread of each series' samples is estimated
+    as the median of its spreads, and a shift must also exceed significance
+    standard deviations of the samples.
+
+    Args:
+        data: Timings, optionally with the spread of each as returned by
+            ``load_statistics``. Only part of a series may be given along with
+            the median spread of the whole series as "spread_median".
+        significance: Number of standard deviations of the samples a shift
+            must exceed.
+
+    Returns:
+        The tolerance of each row of data.
+    """
+    result = np.full(len(data), 0.95)
+    if "spread" not in data:
+        return result
+    if "spread_median" in data:
+        median = data["spread_median"].to_numpy(dtype=float)
+    else:
+        median = (
+            data.groupby(series_keys(data), sort=False, observed=True)["spread"]
+            .transform("median")
+            .to_numpy(dtype=float)
+        )
+    # The interquartile range of a normal distribution is 1.349 deviations.
+    noise = median / 1.349
+    # Series without statistics keep the default.
+    result = np.fmin(result, 1 / (1 + significance * noise))
+    return result
+
+
 class RollingDetector(Detector):
-    def __init__(self, *, window_size: int):
+    """Detect regressions by comparing rolling extremes of each series.
+
+    Args:
+        window_size: Number of timings in each rolling window.
+        engine: "pandas" computes with groupby-rolling. "numpy" and "numba"
+            compute all series in a single pass over contiguous arrays; "numba"
+            requires numba to be installed. All engines give identical results.
+        significance: Number of standard deviations of a series' samples a
+            regression must exceed, when the timings have a "spread" column.
+            See ``tolerances``.
+    """
+
+    def __init__(
+        self, *, window_size: int, engine: str = "pandas", significance: float = 3.0
+    ):
+        if engine not in ("pandas", "numpy", "numba"):
+            raise ValueError(f"Unknown engine: {engine}")
+        if engine == "numba" and numba is None:
+            raise ImportError("engine='numba' requires numba to be installed")
         self._window_size = window_size
+        self._engine = engine
+        self._significance = significance
 
     def detect_regression(self, data: pd.DataFrame) -> pd.DataFrame:
         data = data[data.time.notnull()].sort_values("revision")
-        keys = ["name", "params"]
-        tol = 0.95
+        if self._engine != "pandas":
+            return self._detect_regression_arrays(data)
+        keys = series_keys(data)
+        tol = tolerances(data, self._significance)
 
         data["established_worst"] = (
             data.groupby(keys, as_index=False)["time"]
@@ -43,3 +159,419 @@ class RollingDetector(Detector):
         data["pct_change"] = data.groupby(keys).time.pct_change()
         data["abs_change"] = data.time - data.groupby(keys).time.shift(1)
         return data
+
+    def _detect_regression_arrays(self, data: pd.DataFrame) -> pd.DataFrame:
+        window_size = self._window_size
+        right = (window_size - 1) // 2
+
+        order, times, starts, ends = _contiguous_series(data)
+        tol = tolerances(data, self._significance)[order]
+        n = len(times)
+        sizes = ends - starts
+        pos = np.arange(n) - np.repeat(starts, sizes)
+        remaining = np.repeat(ends, sizes) - np.arange(n)
+
+        worst = np.full(n, np.nan)
+        best = np.full(n, np.nan)
+        if self._engine == "numba":
+            _rolling_extremes_numba(times, starts, ends, window_size, worst, best)
+        elif n >= window_size:
+            windows = np.lib.stride_tricks.sliding_window_view(times, window_size)
+            # Window k covers rows k to k + window_size - 1 and is centered at
+            # row k + window_size - 1 - right; it's only valid within a series.
+            valid = pos[window_size - 1 :] >= window_size - 1
+            center = np.arange(window_size - 1 - right, n - right)[valid]
+            worst[center] = windows.max(axis=1)[valid]
+            best[center] = windows.min(axis=1)[valid]
+
+        shift = window_size // 2
+        prev_worst = np.full(n, np.nan)
+        prev_worst[window_size:] = worst[: max(n - window_size, 0)]
+        prev_worst[pos < window_size] = np.nan
+        with np.errstate(invalid="ignore"):
+            mask = prev_worst < tol * best
+        prev_mask = np.zeros(n, dtype=bool)
+        prev_mask[1:] = mask[:-1]
+        prev_mask[pos < 1] = False
+        mask &= ~prev_mask
+        is_regression = np.zeros(n, dtype=bool)
+        is_regression[: max(n - shift, 0)] = mask[shift:]
+        is_regression[remaining <= shift] = False
+
+        prev_time = np.full(n, np.nan)
+        prev_time[1:] = times[:-1]
+        prev_time[starts] = np.nan
+
+        columns = {
+            "established_worst": worst,
+            "established_best": best,
+            "is_regression": is_regression,
+            "pct_change": times / prev_time - 1,
+            "abs_change": times - prev_time,
+        }
+        return _restore_order(data, columns, order)
+
+
+def _rolling_extremes(times, starts, ends, window_size, worst, best):
+    # Centered rolling max and min of each series using monotonic deques.
+    right = (window_size - 1) // 2
+    max_queue = np.empty(len(times), dtype=np.int64)
+    min_queue = np.empty(len(times), dtype=np.int64)
+    for start, end in zip(starts, ends):
+        max_head, max_tail, min_head, min_tail = 0, 0, 0, 0
+        for j in range(start, end):
+            while max_tail > max_head and times[max_queue[max_tail - 1]] <= times[j]:
+                max_tail -= 1
+            max_queue[max_tail] = j
+            max_tail += 1
+            if max_queue[max_head] <= j - window_size:
+                max_head += 1
+            while min_tail > min_head and times[min_queue[min_tail - 1]] >= times[j]:
+                min_tail -= 1
+            min_queue[min_tail] = j
+            min_tail += 1
+            if min_queue[min_head] <= j - window_size:
+                min_head += 1
+            if j - start >= window_size - 1:
+                worst[j - right] = times[max_queue[max_head]]
+                best[j - right] = times[min_queue[min_head]]
+
+
+if numba is not None:
+    _rolling_extremes_numba = numba.njit(cache=True)(_rolling_extremes)
+else:
+    _rolling_extremes_numba = _rolling_extremes
+
+
+class PeltDetector(Detector):
+    """Detect regressions as change points of each series.
+
+    Each series is split into segments with PELT, a pruned search for the
+    change points minimizing the squared error of the log-times around their
+    segment mean plus a penalty per change point. The penalty scales with a
+    robust estimate of the series' noise. A change point is a regression when
+    the median of its segment is more than 5% above the median of the previous
+    segment, or by more than ``tolerances`` allows for noisy series. Unlike
+    RollingDetector, a regression is found as soon as ``min_size`` timings
+    follow it.
+
+    Args:
+        penalty: Penalty per change point, in units of the noise variance
+            times the log of the series' length. Higher finds fewer regressions.
+        min_size: Minimum number of timings in a segment.
+        engine: "numpy" runs a Python loop per series and timing, computing the
+            cost of all candidate change points at once. "numba" compiles the
+            search and runs the series in parallel; it requires numba to be
+            installed. Defaults to "numba" when numba is installed.
+        significance: Number of standard deviations of a series' samples a
+            regression must exceed, when the timings have a "spread" column.
+    """
+
+    def __init__(
+        self,
+        *,
+        penalty: float = 4.0,
+        min_size: int = 3,
+        engine: str | None = None,
+        significance: float = 3.0,
+    ):
+        if engine is None:
+            engine = "numpy" if numba is None else "numba"
+        if engine not in ("numpy", "numba"):
+            raise ValueError(f"Unknown engine: {engine}")
+        if engine == "numba" and numba is None:
+            raise ImportError("engine='numba' requires numba to be installed")
+        self._penalty = penalty
+        self._min_size = min_size
+        self._engine = engine
+        self._significance = significance
+
+    def detect_regression(self, data: pd.DataFrame) -> pd.DataFrame:
+        data = data[data.time.notnull()].sort_values("revision")
+
+        order, times, starts, ends = _contiguous_series(data)
+        tol = tolerances(data, self._significance)[order]
+        n = len(times)
+        log_times = np.log(np.maximum(times, np.finfo(float).tiny))
+        level = np.empty(n)
+        is_regression = np.zeros(n, dtype=bool)
+        pelt = _pelt_numba if self._engine == "numba" else _pelt_numpy
+        pelt(
+            log_times,
+            times,
+            starts,
+            ends,
+            self._penalty,
+            self._min_size,
+            tol,
+            level,
+            is_regression,
+        )
+
+        prev_time = np.full(n, np.nan)
+        prev_time[1:] = times[:-1]
+        prev_time[starts] = np.nan
+
+        # A segment is established at its median.
+        columns = {
+            "established_worst": level,
+            "established_best": level,
+            "is_regression": is_regression,
+            "pct_change": times / prev_time - 1,
+            "abs_change": times - prev_time,
+        }
+        return _restore_order(data, columns, order)
+
+
+_prange = range if numba is None else numba.prange
+
+
+def _pelt_beta(x, penalty):
+    # Penalty per change point of a series of log-times. The noise is estimated
+    # robustly from the differences of consecutive timings, with a floor of
+    # 0.1% so constant series have a penalty.
+    sigma = max(1.4826 * np.median(np.abs(np.diff(x))) / np.sqrt(2.0), 1e-3)
+    return penalty * sigma**2 * np.log(len(x))
+
+
+def _segment_levels(times, tol, last, start, level, is_regression):
+    # The median of each segment ending at the change points in last, and
+    # whether each change point is a regression.
+    t = len(last) - 1
+    previous = np.nan
+    segments = []
+    while t > 0:
+        segments.append((last[t], t))
+        t = last[t]
+    for i in range(len(segments) - 1, -1, -1):
+        a, b = segments[i]
+        median = np.median(times[start + a : start + b])
+        level[start + a : start + b] = median
+        if previous < tol[start + a] * median:
+            is_regression[start + a] = True
+        previous = median
+
+
+def _pelt(log_times, times, starts, ends, penalty, min_size, tol, level, is_regression):
+    # Change points of each series with PELT, then the median of each segment
+    # and whether each change point is a regression.
+    for k in _prange(len(starts)):
+        start, end = starts[k], ends[k]
+        n = end - start
+        x = log_times[start:end]
+        if n < 2 * min_size:
+            level[start:end] = np.median(times[start:end])
+            continue
+        beta = _pelt_beta(x, penalty)
+
+        sums = np.zeros(n + 1)
+        squares = np.zeros(n + 1)
+        for i in range(n):
+            sums[i + 1] = sums[i] + x[i]
+            squares[i + 1] = squares[i] + x[i] * x[i]
+        cost = np.full(n + 1, np.inf)
+        cost[0] = -beta
+        last = np.zeros(n + 1, dtype=np.int64)
+        candidates = np.zeros(n + 1, dtype=np.int64)
+        n_candidates = 1
+        totals = np.empty(n + 1)
+        for t in range(min_size, n + 1):
+            best = np.inf
+            for j in range(n_candidates):
+                s = candidates[j]
+                total = sums[t] - sums[s]
+                error = squares[t] - squares[s] - total * total / (t - s)
+                totals[j] = cost[s] + error
+                if totals[j] + beta < best:
+                    best = totals[j] + beta
+                    last[t] = s
+            cost[t] = best
+            # Candidates that cannot be the last change point of any later
+            # optimal segmentation are pruned.
+            kept = 0
+            for j in range(n_candidates):
+                if totals[j] <= best:
+                    candidates[kept] = candidates[j]
+                    kept += 1
+            candidates[kept] = t - min_size + 1
+            n_candidates = kept + 1
+
+        _segment_levels(times, tol, last, start, level, is_regression)
+
+
+def _pelt_numpy(
+    log_times, times, starts, ends, penalty, min_size, tol, level, is_regression
+):
+    # Same as _pelt, with the cost of all candidates of each t computed at once
+    # from cumulative sums, for when numba is not installed.
+    for start, end in zip(starts, ends):
+        n = end - start
+        x = log_times[start:end]
+        if n < 2 * min_size:
+            level[start:end] = np.median(times[start:end])
+            continue
+        beta = _pelt_beta(x, penalty)
+
+        sums = np.concatenate([[0.0], np.cumsum(x)])
+        squares = np.concatenate([[0.0], np.cumsum(x * x)])
+        cost = np.full(n + 1, np.inf)
+        cost[0] = -beta
+        last = np.zeros(n + 1, dtype=np.int64)
+        candidates = np.zeros(1, dtype=np.int64)
+        for t in range(min_size, n + 1):
+            total = sums[t] - sums[candidates]
+            error = squares[t] - squares[candidates] - total * total / (t - candidates)
+            totals = cost[candidates] + error
+            penalized = totals + beta
+            j = np.argmin(penalized)
+            best = penalized[j]
+            last[t] = candidates[j]
+            cost[t] = best
+            candidates = np.append(candidates[totals <= best], t - min_size + 1)
+
+        _segment_levels(times, tol, last, start, level, is_regression)
+
+
+if numba is not None:
+    _pelt_beta = numba.njit(cache=True)(_pelt_beta)
+    _segment_levels = numba.njit(cache=True)(_segment_levels)
+    _pelt_numba = numba.njit(cache=True, parallel=True)(_pelt)
+else:
+    _pelt_numba = _pelt
+
+
+class Regression(NamedTuple):
+    name: str
+    params: str
+    env: str
+    revision: int
+    time: float
+    established_best: float
+    established_worst: float
+    pct_change: float
+    abs_change: float
+
+
+class _SeriesState:
+    __slots__ = ("revisions", "times", "extremes", "count", "mask")
+
+    def __init__(self, window_size: int):
+        # The last window_size + 1 timings and, aligned with them, the
+        # established best and worst of the rows at the center of each window.
+        self.revisions: deque[int] = deque(maxlen=window_size + 1)
+        self.times: deque[float] = deque(maxlen=window_size + 1)
+        self.extremes: deque[tuple[float, float]] = deque(maxlen=window_size + 1)
+        self.count = 0
+        self.mask = False
+
+
+class StreamingDetector(Detector):
+    """Detect regressions as timings arrive, one revision at a time.
+
+    Gives the same results as RollingDetector on timings without a spread,
+    which the stream does not carry. Each series only keeps the last
+    ``window_size + 1`` timings, and a regression at a revision is confirmed once
+    ``window_size - 1`` further timings of the series have arrived.
+    """
+
+    def __init__(self, *, window_size: int):
+        self._window_size = window_size
+        self._states: dict[tuple[str, str, str], _SeriesState] = {}
+
+    def update(
+        self, name: str, params: str, env: str, revision: int, time: float
+    ) -> Regression | None:
+        """Add a timing of a benchmark.
+
+        Timings of each series must arrive in order of revision.
+
+        Args:
+            name: Name of the benchmark.
+            params: Parameter string of the benchmark.
+            env: Environment the benchmark ran in; each environment is a
+                separate series.
+            revision: Revision of the timing.
+            time: The timing.
+
+        Returns:
+            The regression confirmed by this timing, if any.
+        """
+        if pd.isna(time):
+            return None
+        state = self._states.get((name, params, env))
+        if state is None:
+            state = self._states[name, params, env] = _SeriesState(self._window_size)
+        _, is_regression = self._push(state, revision, time)
+        if not is_regression:
+            return None
+
+        # The confirmed row is window_size - 1 rows behind the latest timing.
+        row = -self._window_size
+        time = state.times[row]
+        prev_time = (
+            state.times[row - 1] if len(state.times) > self._window_size else np.nan
+        )
+        best, worst = state.extremes[-1 - self._window_size // 2]
+        return Regression(
+            name=name,
+            params=params,
+            env=env,
+            revision=state.revisions[row],
+            time=time,
+            established_best=best,
+            established_worst=worst,
+            pct_change=time / prev_time - 1,
+            abs_change=time - prev_time,
+        )
+
+    def detect_regression(self, data: pd.DataFrame) -> pd.DataFrame:
+        data = data[data.time.notnull()].sort_index()
+        keys = series_keys(data)
+        right = (self._window_size - 1) // 2
+
+        worst = np.full(len(data), np.nan)
+        best = np.full(len(data), np.nan)
+        is_regression = np.zeros(len(data), dtype=bool)
+        times = data["time"].to_numpy(dtype=float)
+        revisions = data.index.get_level_values("revision")
+        for positions in data.groupby(keys).indices.values():
+            state = _SeriesState(self._window_size)
+            for j, position in enumerate(positions):
+                extremes, flag = self._push(state, revisions[position], times[position])
+                if j >= right:
+                    best[positions[j - right]], worst[positions[j - right]] = extremes
+                if flag:
+                    is_regression[positions[j - self._window_size + 1]] = True
+
+        data["established_worst"] = worst
+        data["established_best"] = best
+        data["is_regression"] = is_regression
+        data["pct_change"] = data.groupby(keys).time.pct_change()
+        data["abs_change"] = data.time - data.groupby(keys).time.shift(1)
+        return data
+
+    def _push(
+        self, state: _SeriesState, revision: int, time: float
+    ) -> tuple[tuple[float, float], bool]:
+        # Returns the established best and worst of the row at the center of the
+        # window ending at this timing, and whether the row window_size - 1 rows
+        # back is a regression.
+        tol = 0.95
+        window_size = self._window_size
+        state.revisions.append(revision)
+        state.times.append(time)
+        state.count += 1
+
+        if state.count >= window_size:
+            window = list(state.times)[-window_size:]
+            extremes = (min(window), max(window))
+        else:
+            extremes = (np.nan, np.nan)
+        state.extremes.append(extremes)
+
+        mask = False
+        if len(state.extremes) > window_size:
+            mask = state.extremes[0][1] < tol * extremes[0]
+        is_regression = mask and not state.mask and state.count >= window_size
+        state.mask = mask
+        return extremes, is_regression
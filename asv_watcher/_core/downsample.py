@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select points of a series with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always selected. The points in between are
+    split into ``n_out - 2`` buckets, and from each bucket the point forming
+    the largest triangle with the previously selected point and the average of
+    the next bucket is selected.
+
+    Args:
+        x: Increasing x values of the series.
+        y: y values of the series.
+        n_out: Number of points to select, at least 3.
+
+    Returns:
+        Positions of the selected points, in increasing order.
+    """
+    n = len(x)
+    if n <= n_out:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    # Missing values never form the largest triangle.
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64), nan=np.nanmean(y))
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.intp) + 1
+    edges[-1] = n - 1
+
+    result = np.empty(n_out, dtype=np.intp)
+    result[0], result[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        result[i + 1] = previous
+    return result
+
+
+def downsample(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_out: int,
+    keep: np.ndarray | None = None,
+    x_range: tuple[float, float] | None = None,
+) -> np.ndarray:
+    """Select the points of a series to plot.
+
+    Args:
+        x: Increasing x values of the series.
+        y: y values of the series.
+        n_out: Number of points to select with ``lttb``. When the range holds
+            no more points than this, all of them are selected.
+        keep: Boolean mask of points that are always selected when in range,
+            such as regressions.
+        x_range: Only select points within this range of x, along with the
+            nearest point on either side so lines reach the edges.
+
+    Returns:
+        Positions of the selected points, in increasing order.
+    """
+    start, stop = 0, len(x)
+    if x_range is not None:
+        start = max(int(np.searchsorted(x, x_range[0], side="left")) - 1, 0)
+        stop = min(int(np.searchsorted(x, x_range[1], side="right")) + 1, len(x))
+    result = start + lttb(x[start:stop], y[start:stop], n_out)
+    if keep is not None:
+        kept = start + np.flatnonzero(keep[start:stop])
+        result = np.union1d(result, kept)
+    return result
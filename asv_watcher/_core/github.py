@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+# Commits looked up by a single GraphQL query.
+BATCH_SIZE = 50
+
+_COMMIT_QUERY = """
+c{index}: object(expression: "{sha}") {{
+  ... on Commit {{
+    associatedPullRequests(first: 5) {{
+      nodes {{ number title merged author {{ login __typename }} }}
+    }}
+  }}
+}}
+"""
+
+
+class GitHubCache:
+    """Persistent cache of GitHub responses, expiring after a time to live."""
+
+    def __init__(self, path: Path, ttl: float = 24 * 60 * 60) -> None:
+        """Open the cache, creating it if necessary.
+
+        Args:
+            path: SQLite database of the cache.
+            ttl: Seconds after which an entry is fetched again.
+        """
+        self._path = path
+        self._ttl = ttl
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses"
+                " (key TEXT PRIMARY KEY, value TEXT, fetched REAL)"
+            )
+
+    def get(self, keys: list[str]) -> dict[str, Any]:
+        """Get the entries that have not expired.
+
+        Args:
+            keys: Keys of the entries.
+
+        Returns:
+            The value of each key that has an entry which has not expired.
+        """
+        result = {}
+        oldest = time.time() - self._ttl
+        with self._connect() as connection:
+            # Stay below SQLite's limit on the number of parameters.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                rows = connection.execute(
+                    "SELECT key, value FROM responses WHERE fetched > ?"
+                    f" AND key IN ({', '.join('?' * len(chunk))})",
+                    [oldest, *chunk],
+                )
+                result.update({key: json.loads(value) for key, value in rows})
+        return result
+
+    def set(self, values: dict[str, Any]) -> None:
+        """Store entries, replacing any existing entry of the same key.
+
+        Args:
+            values: Values to store by key. They must be serializable to JSON.
+        """
+        fetched = time.time()
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                [(key, json.dumps(value), fetched) for key, value in values.items()],
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per operation, so the cache can be shared across threads.
+        connection = sqlite3.connect(self._path)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+async def gh(*args: str, cwd: Path | None = None) -> str:
+    """Run the GitHub CLI.
+
+    Args:
+        args: Arguments of ``gh``.
+        cwd: Working directory, which determines the repository when the
+            arguments do not.
+
+    Returns:
+        The output of the command.
+
+    Raises:
+        ValueError: If the command fails.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "gh",
+        *args,
+        cwd=cwd,
+        env={**os.environ, "NO_COLOR": "1"},
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise ValueError(stderr.decode())
+    return stdout.decode()
+
+
+def pull_requests(
+    shas: list[str],
+    repo: str,
+    cache: GitHubCache,
+    batch_size: int = BATCH_SIZE,
+    concurrency: int = 4,
+) -> dict[str, list[dict[str, Any]]]:
+    """Find the merged pull requests that introduced commits.
+
+    Commits that are not cached are looked up in batches, with one GraphQL
+    query per batch, and the batches are run concurrently.
+
+    Args:
+        shas: Hashes of the commits.
+        repo: Repository of the commits, in the form "owner/name".
+        cache: Cache of the lookups.
+        batch_size: Number of commits per query.
+        concurrency: Maximum number of queries that run at the same time.
+
+    Returns:
+        The pull requests of each commit, each with its number, title and the
+        logins of its authors that are not bots.
+    """
+    keys = {sha: f"pr:{repo}:{sha}" for sha in shas}
+    cached = cache.get(list(keys.values()))
+    missing = [sha for sha in shas if keys[sha] not in cached]
+    if len(missing) > 0:
+        batches = [
+            missing[start : start + batch_size]
+            for start in range(0, len(missing), batch_size)
+        ]
+        fetched = asyncio.run(_fetch_pull_requests(batches, repo, concurrency))
+        values = {keys[sha]: value for sha, value in fetched.items()}
+        cache.set(values)
+        cached.update(values)
+    result = {sha: cached[keys[sha]] for sha in shas}
+    return result
+
+
+async def _fetch_pull_requests(
+    batches: list[list[str]], repo: str, concurrency: int
+) -> dict[str, list[dict[str, Any]]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(batch: list[str]) -> dict[str, list[dict[str, Any]]]:
+        owner, name = repo.split("/")
+        commits = "".join(
+            _COMMIT_QUERY.format(index=index, sha=sha)
+            for index, sha in enumerate(batch)
+        )
+        query = (
+            f'query {{ repository(owner: "{owner}", name: "{name}") {{{commits}}} }}'
+        )
+        async with semaphore:
+            response = await gh("api", "graphql", "-f", f"query={query}")
+        repository = json.loads(response)["data"]["repository"]
+        result = {}
+        for index, sha in enumerate(batch):
+            commit = repository[f"c{index}"] or {}
+            nodes = commit.get("associatedPullRequests", {"nodes": []})["nodes"]
+            result[sha] = [
+                {
+                    "number": node["number"],
+                    "title": node["title"],
+                    "authors": _authors(node),
+                }
+                for node in nodes
+                if node["merged"]
+            ]
+        return result
+
+    responses = await asyncio.gather(*(fetch(batch) for batch in batches))
+    result = {sha: prs for response in responses for sha, prs in response.items()}
+    return result
+
+
+def _authors(pull_request: dict[str, Any]) -> list[str]:
+    author = pull_request["author"]
+    if author is None or author["__typename"] == "Bot":
+        return []
+    return [author["login"]]
+
+
+def cached_gh(cache: GitHubCache, *args: str, cwd: Path | None = None) -> str:
+    """Run the GitHub CLI, reusing the output of a previous run if cached.
+
+    Args:
+        cache: Cache of the outputs.
+        args: Arguments of ``gh``.
+        cwd: Working directory, which determines the repository when the
+            arguments do not.
+
+    Returns:
+        The output of the command.
+    """
+    key = "gh:" + json.dumps([str(cwd), *args])
+    cached = cache.get([key])
+    if key not in cached:
+        cached[key] = asyncio.run(gh(*args, cwd=cwd))
+        cache.set({key: cached[key]})
+    return cached[key]
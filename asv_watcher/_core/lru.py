@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import collections
+import threading
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """Cache evicting the least recently used entries beyond its bounds.
+
+    Entries belong to a generation, such as the version of the data they were
+    computed from. Moving to a new generation drops every entry.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 2**20) -> None:
+        """Create an empty cache.
+
+        Args:
+            max_entries: Maximum number of entries.
+            max_bytes: Maximum total size of the entries.
+        """
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: collections.OrderedDict[Hashable, tuple[Any, int]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.generation: Hashable = None
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get an entry, marking it as the most recently used.
+
+        Args:
+            key: Key of the entry.
+            default: Returned if there is no entry.
+
+        Returns:
+            The value of the entry, or default.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value: Any, nbytes: int) -> None:
+        """Add an entry, evicting the least recently used entries if necessary.
+
+        Args:
+            key: Key of the entry.
+            value: Value of the entry.
+            nbytes: Size of the value. Values larger than the cache are not
+                added.
+        """
+        if nbytes > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while len(self._entries) > self._max_entries or (
+                self.nbytes > self._max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+
+    def invalidate(self, generation: Hashable) -> None:
+        """Move to a generation, dropping every entry if it is a new one.
+
+        Args:
+            generation: Generation of the entries that are added next.
+        """
+        with self._lock:
+            if generation == self.generation:
+                return
+            self._entries.clear()
+            self.nbytes = 0
+            self.generation = generation
+
+    def stats(self) -> dict[str, int]:
+        """Counters of the cache's use.
+
+        Returns:
+            The hits, misses and evictions, along with the current number of
+            entries and their total size.
+        """
+        with self._lock:
+            result = {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "nbytes": self.nbytes,
+            }
+        return result
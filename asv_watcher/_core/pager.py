@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import math
+import operator
+import re
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from asv_watcher._core import util
+
+# A single condition of a Dash filter_query, e.g. {pct_change} > 0.1.
+_CONDITION = re.compile(r"\{(?P<column>[^}]+)\}\s+(?P<op>\S+)\s+(?P<value>.+)")
+
+_COMPARISONS: dict[str, Callable[[Any, Any], Any]] = {
+    "=": operator.eq,
+    "eq": operator.eq,
+    "!=": operator.ne,
+    "ne": operator.ne,
+    "<": operator.lt,
+    "lt": operator.lt,
+    "<=": operator.le,
+    "le": operator.le,
+    ">": operator.gt,
+    "gt": operator.gt,
+    ">=": operator.ge,
+    "ge": operator.ge,
+}
+
+_UNITS = {"%": 0.01, "s": 1.0, "ms": 1e-3, "us": 1e-6, "ns": 1e-9}
+
+
+class Pager:
+    """Server-side paging, sorting and filtering of a table.
+
+    Serves the ``page_action="custom"``, ``sort_action="custom"`` and
+    ``filter_action="custom"`` modes of a Dash DataTable. The row order of each
+    sort is computed once and reused, and only the rows of the requested page
+    are formatted and serialized.
+    """
+
+    def __init__(self, data: pd.DataFrame, columns: list[str]) -> None:
+        """Create a pager.
+
+        Args:
+            data: Rows of the table. Columns with a ``{column}_value`` counterpart
+                are sorted and compared by their value, and their display
+                strings are only formatted for the rows that are served.
+            columns: Columns of the table that are served.
+        """
+        self._data = data.reset_index(drop=True)
+        self._columns = columns
+        self._orders: dict[tuple[str, bool], np.ndarray] = {}
+        self._strings: dict[str, pd.Series] = {}
+        self._filter: tuple[str, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def page(
+        self,
+        page_current: int | None,
+        page_size: int,
+        sort_by: list[dict[str, str]] | None = None,
+        filter_query: str | None = None,
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Get a page of the table.
+
+        Args:
+            page_current: Index of the page. Pages past the last are clamped to
+                the last page.
+            page_size: Number of rows in a page.
+            sort_by: Sort of the table, as in the ``sort_by`` of a DataTable.
+                Only the first column is used.
+            filter_query: Filter of the table, as in the ``filter_query`` of a
+                DataTable. Conditions that cannot be parsed are ignored.
+
+        Returns:
+            The records of the page and the number of pages.
+        """
+        if sort_by:
+            order = self.order(
+                sort_by[0]["column_id"], sort_by[0]["direction"] == "asc"
+            )
+        else:
+            order = np.arange(len(self._data))
+        if filter_query:
+            order = order[self.mask(filter_query)[order]]
+
+        page_count = max(math.ceil(len(order) / page_size), 1)
+        page_current = min(page_current or 0, page_count - 1)
+        rows = order[page_current * page_size : (page_current + 1) * page_size]
+        result = util.display_strings(self._data.iloc[rows])[self._columns]
+        return result.to_dict("records"), page_count
+
+    def order(self, column: str, ascending: bool = True) -> np.ndarray:
+        """Positions of the rows sorted by a column, with missing values last.
+
+        Args:
+            column: Column of the table.
+            ascending: Whether to sort in ascending order.
+
+        Returns:
+            The positions of the rows in sorted order.
+        """
+        key = (column, ascending)
+        if key not in self._orders:
+            values = self._data[self._value_column(column)]
+            self._orders[key] = (
+                values.sort_values(ascending=ascending, kind="stable")
+                .index.to_numpy()
+                .astype(np.intp)
+            )
+        return self._orders[key]
+
+    def mask(self, filter_query: str) -> np.ndarray:
+        """Rows matching a filter query.
+
+        Args:
+            filter_query: Conditions of the form ``{column} operator value``
+                joined by ``&&``.
+
+        Returns:
+            Boolean mask of the matching rows.
+        """
+        if self._filter is not None and self._filter[0] == filter_query:
+            return self._filter[1]
+        result = np.ones(len(self._data), dtype=bool)
+        for condition in filter_query.split(" && "):
+            match = _CONDITION.fullmatch(condition.strip())
+            if match is None or self._value_column(match["column"]) not in self._data:
+                continue
+            column, op, value = match["column"], match["op"], match["value"]
+            value = value.strip()
+            if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'`":
+                value = value[1:-1]
+            condition_mask = self._condition(column, op.lower(), value)
+            if condition_mask is not None:
+                result &= condition_mask
+        self._filter = (filter_query, result)
+        return result
+
+    def _condition(self, column: str, op: str, value: str) -> np.ndarray | None:
+        if op in ["contains", "icontains", "scontains"]:
+            strings = self._display_strings(column)
+            case = op != "icontains"
+            return strings.str.contains(value, case=case, regex=False).to_numpy()
+        if op == "datestartswith":
+            strings = self._data[column].astype(str)
+            return strings.str.startswith(value).to_numpy()
+        op = op[1:] if op[:1] in ["s", "i"] and op[1:] in _COMPARISONS else op
+        if op not in _COMPARISONS:
+            return None
+        values = self._data[self._value_column(column)]
+        try:
+            other = self._parse(values, value)
+        except ValueError:
+            return None
+        with np.errstate(invalid="ignore"):
+            return np.asarray(_COMPARISONS[op](values, other), dtype=bool)
+
+    def _parse(self, values: pd.Series, value: str) -> Any:
+        # Convert a value of a filter query to the type of a column.
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            result = pd.Timestamp(value)
+            if result.tz is None:
+                result = result.tz_localize(values.dtype.tz)
+            return result
+        if not pd.api.types.is_numeric_dtype(values):
+            return value
+        for unit in sorted(_UNITS, key=len, reverse=True):
+            if value.endswith(unit):
+                return float(value[: -len(unit)]) * _UNITS[unit]
+        return float(value)
+
+    def _value_column(self, column: str) -> str:
+        if f"{column}_value" in self._data:
+            return f"{column}_value"
+        return column
+
+    def _display_strings(self, column: str) -> pd.Series:
+        # Text comparisons need the display strings of every row.
+        if column not in self._strings:
+            if f"{column}_value" in self._data:
+                strings = util.display_strings(self._data[[f"{column}_value"]])
+                self._strings[column] = strings[column]
+            else:
+                self._strings[column] = self._data[column].astype(str)
+        return self._strings[column]
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-import itertools as it
+import numpy as np
 
 
 class Parameters:
-    def __init__(self, names: list[str], values: tuple[str]):
+    __slots__ = ("_names", "_values")
+
+    def __init__(self, names: list[str], values: tuple[str, ...]):
         self._names = names
         self._values = values
 
@@ -14,9 +16,72 @@ class Parameters:
 
 
 class ParameterCollection:
-    def __init__(self, names: list[str], values: list[str]):
-        self._params = [
-            # mypy doesn't understand that v is a tuple of strings
-            Parameters(names, v)  # type: ignore[arg-type]
-            for v in it.product(*values)
-        ]
+    """All combinations of a benchmark's parameters.
+
+    Combinations are ordered as in ``itertools.product(*values)`` and are
+    identified by their flat index. Only the values of each dimension are stored;
+    the value of dimension k for combination i is ``values[k][codes(k, i)]``,
+    where the codes are the mixed-radix digits of i.
+    """
+
+    __slots__ = ("_names", "_values", "_strides")
+
+    def __init__(self, names: list[str], values: list[list[str]]):
+        self._names = names
+        self._values = [np.asarray(v, dtype=object) for v in values]
+        sizes = [len(v) for v in values]
+        self._strides = [int(np.prod(sizes[k + 1 :])) for k in range(len(sizes))]
+
+    def __len__(self) -> int:
+        return int(np.prod([len(v) for v in self._values]))
+
+    def __getitem__(self, index: int) -> Parameters:
+        n = len(self)
+        if not -n <= index < n:
+            raise IndexError(f"index {index} is out of range for {n} combinations")
+        index %= n
+        values = tuple(
+            self._values[k][self.codes(k, index)] for k in range(len(self._names))
+        )
+        return Parameters(self._names, values)
+
+    def codes(self, dimension: int, indices: int | np.ndarray) -> np.ndarray:
+        """Position of each combination's value within a dimension.
+
+        Args:
+            dimension: Index of the parameter.
+            indices: Flat indices of combinations.
+
+        Returns:
+            Codes into the values of the parameter.
+        """
+        return (
+            np.asarray(indices)
+            // self._strides[dimension]
+            % len(self._values[dimension])
+        )
+
+    def param_strings(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """Parameter strings, as in ``make_param_string``, of a range of combinations.
+
+        Args:
+            start: Flat index of the first combination.
+            stop: Flat index after the last combination. Defaults to all
+                combinations.
+
+        Returns:
+            Object array with the parameter string of each combination.
+        """
+        if stop is None:
+            stop = len(self)
+        indices = np.arange(start, stop)
+        if len(self._names) == 0:
+            return np.full(len(indices), "", dtype=object)
+        parts = []
+        for k, (name, values) in enumerate(zip(self._names, self._values)):
+            labels = np.array([f"{name}={value}" for value in values], dtype=object)
+            parts.append(labels[self.codes(k, indices)])
+        result = parts[0]
+        for labels in parts[1:]:
+            result = result + "; " + labels
+        return result
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterable
+
+# Returned by Prefetcher.get while a key is being resolved.
+PENDING = object()
+
+# Keys that are requested are resolved before keys that are only prefetched.
+_REQUESTED = 0
+_PREFETCHED = 1
+
+
+class Prefetcher:
+    """Resolve keys on background threads, ahead of when they are requested.
+
+    Results are kept until the prefetcher is cleared, errors only for a while,
+    after which the key is resolved again. Reading them never blocks; a key that
+    is not resolved yet is moved to the front of the queue.
+    """
+
+    def __init__(
+        self,
+        resolve: Callable[[Any], Any],
+        workers: int = 1,
+        error_ttl: float = 60.0,
+        errors: tuple[type[Exception], ...] = (OSError, ValueError),
+    ) -> None:
+        """Start the background threads.
+
+        Args:
+            resolve: Computes the result of a key.
+            workers: Number of threads.
+            error_ttl: Seconds for which the error of a key is raised by ``get``
+                before the key is retried, e.g. after a network failure.
+            errors: Exceptions of resolve that are raised by ``get``. Any other
+                exception is a bug and is raised on the thread, stopping it.
+        """
+        self._resolve = resolve
+        self._error_ttl = error_ttl
+        self._error_types = errors
+        # Incremented by clear, so that keys resolved before are dropped.
+        self._generation = 0
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._results: dict[Hashable, Any] = {}
+        # Errors along with the time.monotonic() at which they expire.
+        self._errors: dict[Hashable, tuple[BaseException, float]] = {}
+        self._queued: dict[Hashable, int] = {}
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True) for _ in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def prefetch(self, keys: Iterable[Hashable]) -> None:
+        """Queue keys to be resolved, in order.
+
+        Args:
+            keys: Keys to resolve. Keys that are resolved or queued are skipped.
+        """
+        for key in keys:
+            self._put(key, _PREFETCHED)
+
+    def get(self, key: Hashable) -> Any:
+        """Get the result of a key without waiting for it.
+
+        Args:
+            key: Key to get the result of.
+
+        Returns:
+            The result of the key, or ``PENDING`` if it is not resolved yet.
+
+        Raises:
+            Exception: The exception raised when resolving the key, if any and
+                not yet expired.
+        """
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+            if key in self._errors:
+                err, expiry = self._errors[key]
+                if time.monotonic() < expiry:
+                    raise err
+                del self._errors[key]
+        self._put(key, _REQUESTED)
+        return PENDING
+
+    def clear(self) -> None:
+        """Drop all results and errors, along with the queued keys.
+
+        Keys that are being resolved are dropped once resolved, e.g. when what
+        they are resolved from has changed since.
+        """
+        with self._lock:
+            self._generation += 1
+            self._results.clear()
+            self._errors.clear()
+            self._queued.clear()
+
+    def close(self) -> None:
+        """Stop the background threads once the queued keys are resolved."""
+        for _ in self._threads:
+            self._queue.put((_PREFETCHED + 1, next(self._counter), None))
+        for thread in self._threads:
+            thread.join()
+
+    def _put(self, key: Hashable, priority: int) -> None:
+        with self._lock:
+            if key in self._results or key in self._errors:
+                return
+            if self._queued.get(key, priority + 1) <= priority:
+                return
+            self._queued[key] = priority
+        self._queue.put((priority, next(self._counter), key))
+
+    def _work(self) -> None:
+        while True:
+            priority, _, key = self._queue.get()
+            if priority > _PREFETCHED:
+                return
+            with self._lock:
+                # Skip keys resolved by another thread, or requested since they
+                # were prefetched and so queued twice.
+                if self._queued.get(key) != priority:
+                    continue
+                self._queued[key] = -1
+                generation = self._generation
+            try:
+                result = self._resolve(key)
+            except self._error_types as err:
+                with self._lock:
+                    if self._generation == generation:
+                        expiry = time.monotonic() + self._error_ttl
+                        self._errors[key] = (err, expiry)
+                        del self._queued[key]
+            except BaseException:
+                with self._lock:
+                    if self._generation == generation:
+                        del self._queued[key]
+                raise
+            else:
+                with self._lock:
+                    if self._generation == generation:
+                        self._results[key] = result
+                        del self._queued[key]
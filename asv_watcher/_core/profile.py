@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+
+class Stage:
+    __slots__ = ("name", "seconds", "peak_bytes", "counters", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.counters: dict[str, int] = {}
+        self.children: list[Stage] = []
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Stage:
+        result = cls(data["name"])
+        result.seconds = data["seconds"]
+        result.peak_bytes = data["peak_bytes"]
+        result.counters = dict(data["counters"])
+        result.children = [cls.from_dict(child) for child in data["children"]]
+        return result
+
+    def to_dict(self) -> dict[str, Any]:
+        result = {
+            "name": self.name,
+            "seconds": self.seconds,
+            "peak_bytes": self.peak_bytes,
+            "counters": self.counters,
+            "children": [child.to_dict() for child in self.children],
+        }
+        return result
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes.
+
+    Read from /proc where available; elsewhere the peak resident set size of
+    the process so far, as reported by getrusage.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        import resource
+
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes, except on macOS.
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class Profiler:
+    """Nested timers, counters and peak memory of the stages of a run.
+
+    Stages are entered with ``stage`` and may be nested. The peak memory of a
+    stage is the largest resident set size of the process while it ran, sampled
+    on a background thread every ``interval`` seconds as well as when any stage
+    starts or ends. Sampling doesn't slow down the run, unlike tracing every
+    allocation. Work done in other processes is only reflected in the time.
+    """
+
+    def __init__(self, name: str = "run", interval: float = 0.01):
+        self.root = Stage(name)
+        self._stack = [self.root]
+        self._start = time.perf_counter()
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._sample()
+        self._sampler = threading.Thread(target=self._poll, daemon=True)
+        self._sampler.start()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[Stage]:
+        """Time a stage of the run, nested within the current stage.
+
+        Args:
+            name: Name of the stage.
+
+        Yields:
+            The stage.
+        """
+        parent = self._stack[-1]
+        result = Stage(name)
+        parent.children.append(result)
+        # The stack is replaced rather than modified, for the sampling thread.
+        self._stack = [*self._stack, result]
+        self._sample()
+        start = time.perf_counter()
+        try:
+            yield result
+        finally:
+            result.seconds = time.perf_counter() - start
+            self._sample()
+            self._stack = self._stack[:-1]
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add to a counter of the current stage, e.g. of rows or files.
+
+        Args:
+            name: Name of the counter.
+            value: Amount to add.
+        """
+        counters = self._stack[-1].counters
+        counters[name] = counters.get(name, 0) + int(value)
+
+    def attach(self, report: dict[str, Any]) -> None:
+        """Add the report of another profiler, e.g. from another process.
+
+        Args:
+            report: Report returned by ``Profiler.report``, added as a child
+                of the current stage.
+        """
+        self._stack[-1].children.append(Stage.from_dict(report))
+
+    def report(self) -> dict[str, Any]:
+        """Summarize the run, stopping the sampling of memory.
+
+        Returns:
+            The root stage as nested dicts, with the time and peak memory of the
+            whole run.
+        """
+        self.root.seconds = time.perf_counter() - self._start
+        self._stopped.set()
+        self._sample()
+        return self.root.to_dict()
+
+    def _sample(self) -> None:
+        # Every open stage, including the root, ran at this resident set size.
+        rss = current_rss()
+        for stage in self._stack:
+            stage.peak_bytes = max(stage.peak_bytes, rss)
+
+    def _poll(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self._sample()
+
+
+class NullProfiler:
+    """Profiler that records nothing, used when profiling is off."""
+
+    def stage(self, name: str) -> contextlib.nullcontext:
+        return contextlib.nullcontext()
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+    def attach(self, report: dict[str, Any]) -> None:
+        pass
+
+    def report(self) -> dict[str, Any]:
+        return {}
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def write_report(path: Path, report: dict[str, Any]) -> None:
+    """Write the report of a Profiler as JSON.
+
+    Args:
+        path: Path of the file.
+        report: Report returned by ``Profiler.report``.
+    """
+    os.makedirs(path.parent, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def write_prometheus(path: Path, report: dict[str, Any]) -> None:
+    """Write the report of a Profiler in the Prometheus text format.
+
+    The file is replaced atomically, so that it can be collected by the textfile
+    collector of node_exporter at any time. Stages are labeled by their path,
+    e.g. "run/update/load".
+
+    Args:
+        path: Path of the file, which should end in ".prom".
+        report: Report returned by ``Profiler.report``.
+    """
+    seconds = []
+    peaks = []
+    counters: dict[str, list[str]] = {}
+
+    def visit(stage: dict[str, Any], prefix: str) -> None:
+        label = f'{{stage="{prefix}{stage["name"]}"}}'
+        seconds.append(f"asv_watcher_stage_seconds{label} {stage['seconds']}")
+        peaks.append(f"asv_watcher_stage_peak_bytes{label} {stage['peak_bytes']}")
+        for name, value in stage["counters"].items():
+            counters.setdefault(name, []).append(
+                f"asv_watcher_{name}_total{label} {value}"
+            )
+        for child in stage["children"]:
+            visit(child, f"{prefix}{stage['name']}/")
+
+    visit(report, "")
+    lines = [
+        "# TYPE asv_watcher_stage_seconds gauge",
+        *seconds,
+        "# TYPE asv_watcher_stage_peak_bytes gauge",
+        *peaks,
+    ]
+    for name, samples in counters.items():
+        lines += [f"# TYPE asv_watcher_{name}_total counter", *samples]
+
+    os.makedirs(path.parent, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.tmp")
+    with open(temporary, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(temporary, path)
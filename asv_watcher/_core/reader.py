@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, NamedTuple
+
+import numpy as np
+
+orjson: ModuleType | None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+msgspec: ModuleType | None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+# Decoders of JSON from bytes, fastest first.
+BACKENDS: dict[str, Callable[[bytes], Any]] = {}
+if orjson is not None:
+    BACKENDS["orjson"] = orjson.loads
+if msgspec is not None:
+    BACKENDS["msgspec"] = msgspec.json.Decoder().decode
+BACKENDS["json"] = json.loads
+
+
+class GraphData(NamedTuple):
+    """Timings of a graph file as flat arrays, one element per timing."""
+
+    revisions: np.ndarray
+    combos: np.ndarray
+    times: np.ndarray
+    # Last revision in the file, whether or not it was read; None if empty.
+    last_revision: int | None
+    # Digest of the revisions with timings in the file, see revisions_digest;
+    # None for concatenated files.
+    digest: str | None = None
+
+
+def revisions_digest(revisions: np.ndarray) -> str:
+    """Identify a set of revisions, e.g. those ingested from a graph file."""
+    return hashlib.sha1(np.sort(revisions).astype(np.int64).tobytes()).hexdigest()
+
+
+def read_graph(
+    path: Path,
+    n_combos: int,
+    last_revision: int = -1,
+    backend: str | None = None,
+    digest: str | None = None,
+) -> GraphData:
+    """Read the timings of a graph file.
+
+    The file is read in one go and decoded with the fastest available backend;
+    the timings are then copied into arrays allocated to their final size.
+
+    Args:
+        path: Path to the graph file, a list of [revision, times] pairs where
+            times is a number, a list of numbers for each combination of the
+            benchmark's parameters, or null.
+        n_combos: Number of combinations of the benchmark's parameters; further
+            times are ignored.
+        last_revision: Only revisions after this one are read.
+        backend: Name of the decoder in ``BACKENDS``. Defaults to the fastest.
+        digest: Digest of the revisions read up to last_revision, from a
+            previous read. If the file now has other revisions up to
+            last_revision, e.g. a backfilled run, every revision is read.
+
+    Returns:
+        The revision, combination and time of each timing.
+
+    Raises:
+        ValueError: If the backend is not available.
+    """
+    if backend is None:
+        backend = next(iter(BACKENDS))
+    if backend not in BACKENDS:
+        raise ValueError(f"Unavailable JSON backend: {backend}")
+    data = BACKENDS[backend](path.read_bytes())
+    result = graph_arrays(data, n_combos, last_revision, digest)
+    return result
+
+
+def graph_arrays(
+    data: list, n_combos: int, last_revision: int = -1, digest: str | None = None
+) -> GraphData:
+    """Flatten the decoded contents of a graph file, see ``read_graph``."""
+    latest = max((e[0] for e in data), default=None)
+    rows = [e for e in data if e[1] is not None]
+    all_revisions = np.fromiter((e[0] for e in rows), dtype=np.int64, count=len(rows))
+    if (
+        digest is not None
+        and revisions_digest(all_revisions[all_revisions <= last_revision]) != digest
+    ):
+        last_revision = -1
+    rows = [e for e in rows if e[0] > last_revision]
+    n_rows = len(rows)
+    values = [e[1] for e in rows]
+    # Benchmarks without parameters have a single number per revision.
+    lengths = np.fromiter(
+        (min(len(v), n_combos) if isinstance(v, list) else 1 for v in values),
+        dtype=np.int64,
+        count=n_rows,
+    )
+    n_times = int(lengths.sum())
+    revisions = np.repeat(
+        np.fromiter((e[0] for e in rows), dtype=np.int64, count=n_rows), lengths
+    )
+    offsets = np.cumsum(lengths) - lengths
+    combos = np.arange(n_times) - np.repeat(offsets, lengths)
+    # None, for a failed benchmark, becomes NaN.
+    flat = itertools.chain.from_iterable(
+        v[:n_combos] if isinstance(v, list) else (v,) for v in values
+    )
+    times = np.fromiter(flat, dtype=float, count=n_times)
+    return GraphData(revisions, combos, times, latest, revisions_digest(all_revisions))
+
+
+def concat_graphs(graphs: list[GraphData]) -> GraphData:
+    """Chain the timings of several graph files into one set of arrays."""
+    result = GraphData(
+        np.concatenate([g.revisions for g in graphs]),
+        np.concatenate([g.combos for g in graphs]),
+        np.concatenate([g.times for g in graphs]),
+        max(
+            (g.last_revision for g in graphs if g.last_revision is not None),
+            default=None,
+        ),
+    )
+    return result
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from asv_watcher._core.parameters import ParameterCollection
+from asv_watcher._core.update_data import graph_prefix
+
+
+def generate_collection(
+    path: Path,
+    *,
+    n_benchmarks: int = 50,
+    param_sizes: tuple[int, ...] = (2, 3),
+    n_machines: int = 1,
+    n_revisions: int = 500,
+    regression_rate: float = 0.05,
+    noise: float = 0.01,
+    missing: float = 0.01,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Write the asv results of a synthetic project.
+
+    Like a project's directory in asv-collection, path gets an ``index.json``
+    and a ``graphs/<prefix>/<name>.json`` file per benchmark and machine. Each
+    series is a constant timing with multiplicative noise; some get a step
+    regression at a random revision, at the same revision on every machine.
+
+    Args:
+        path: Directory of the project, created if needed.
+        n_benchmarks: Number of benchmarks, spread over 10 modules.
+        param_sizes: Number of values of each parameter of every benchmark. Empty
+            for benchmarks without parameters.
+        n_machines: Number of machines the benchmarks ran on.
+        n_revisions: Number of revisions benchmarked.
+        regression_rate: Fraction of the series with a regression.
+        noise: Standard deviation of the noise, relative to the timing.
+        missing: Fraction of the timings that are missing.
+        seed: Seed of the random numbers.
+
+    Returns:
+        The injected regressions, indexed by name, params and revision, with the
+        relative size of each step as "step".
+    """
+    rng = np.random.default_rng(seed)
+    revisions = np.arange(n_revisions)
+    param_names = [f"param_{k}" for k in range(len(param_sizes))]
+    param_values = [
+        [f"'{k}-{i}'" for i in range(size)] for k, size in enumerate(param_sizes)
+    ]
+    parameter_collection = ParameterCollection(param_names, param_values)
+    n_combos = len(parameter_collection)
+    names = [f"module_{i % 10}.Suite.time_{i}" for i in range(n_benchmarks)]
+
+    graph_param_list: list[dict[str, str | None]] = [
+        {"arch": "x86_64", "branch": "main", "machine": f"runner-{k}", "python": "3.10"}
+        for k in range(n_machines)
+    ]
+    index_data = {
+        "project": "synthetic",
+        "project_url": "https://github.com/example/synthetic",
+        "show_commit_url": "https://github.com/example/synthetic/commit/",
+        "hash_length": 8,
+        "revision_to_hash": {
+            str(revision): hashlib.sha1(str(revision).encode()).hexdigest()
+            for revision in revisions
+        },
+        "revision_to_date": {
+            str(revision): 1577836800000 + 3_600_000 * int(revision)
+            for revision in revisions
+        },
+        "graph_param_list": graph_param_list,
+        "benchmarks": {
+            name: {
+                "code": "",
+                "name": name,
+                "param_names": param_names,
+                "params": param_values,
+                "type": "time",
+                "unit": "seconds",
+                "version": "1",
+            }
+            for name in names
+        },
+        "params": {},
+        "machines": {},
+        "tags": {},
+        "pages": [],
+    }
+    os.makedirs(path, exist_ok=True)
+    with open(path / "index.json", "w") as f:
+        json.dump(index_data, f)
+
+    # Timings of shape (benchmarks, combinations, revisions), before noise.
+    shape = (n_benchmarks, n_combos)
+    base = 10 ** rng.uniform(-6, -1, shape)
+    is_regression = rng.random(shape) < regression_rate
+    step_revision = rng.integers(n_revisions // 4, max(3 * n_revisions // 4, 1), shape)
+    step = np.where(is_regression, rng.uniform(0.1, 1.0, shape), 0.0)
+    times = base[..., None] * (
+        1 + step[..., None] * (revisions >= step_revision[..., None])
+    )
+
+    for params in graph_param_list:
+        prefix = path / "graphs" / graph_prefix(params)
+        os.makedirs(prefix, exist_ok=True)
+        machine_times = times * rng.uniform(0.5, 2.0)
+        machine_times = machine_times * (1 + noise * rng.standard_normal(times.shape))
+        is_missing = rng.random(times.shape) < missing
+        for i, name in enumerate(names):
+            # Rows of revisions, with None for missing timings as asv writes them.
+            values = machine_times[i].T.astype(object)
+            values[is_missing[i].T] = None
+            if len(param_sizes) == 0:
+                rows = values[:, 0].tolist()
+            else:
+                rows = values.tolist()
+                for k in np.flatnonzero(is_missing[i].all(axis=0)):
+                    rows[k] = None
+            graph_data = [[revision, row] for revision, row in enumerate(rows)]
+            with open(prefix / f"{name}.json", "w") as f:
+                json.dump(graph_data, f)
+
+    benchmark, combo = np.nonzero(is_regression)
+    result = pd.DataFrame(
+        {
+            "name": np.array(names, dtype=object)[benchmark],
+            "params": parameter_collection.param_strings()[combo],
+            "revision": step_revision[benchmark, combo],
+            "step": step[benchmark, combo],
+        }
+    ).set_index(["name", "params", "revision"])
+    return result
@@ -1,45 +1,313 @@
 from __future__ import annotations
 
-import datetime
+import argparse
+import concurrent.futures
+import functools
+import hashlib
 import json
+import multiprocessing
 import os
+import re
 import subprocess
-import tempfile
 import time
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import pandas as pd
-import pytz
 
 from asv_watcher import RollingDetector
 from asv_watcher._core import util
+from asv_watcher._core.cache import read_cache, write_cache
+from asv_watcher._core.detector import Detector
 from asv_watcher._core.parameters import ParameterCollection
+from asv_watcher._core.profile import (
+    NULL_PROFILER,
+    NullProfiler,
+    Profiler,
+    write_prometheus,
+    write_report,
+)
+from asv_watcher._core.reader import GraphData, concat_graphs, graph_arrays, read_graph
 
 
-def run(asv_collection_url, write: bool = False, window_size: int = 30) -> pd.DataFrame:
-    tmpdir = tempfile.TemporaryDirectory()
+def run(
+    asv_collection_url,
+    projects: list[str] | None = None,
+    write: bool = False,
+    window_size: int = 30,
+    incremental: bool = False,
+    workers: int = 1,
+    mirror_path: Path | None = None,
+    statistics: bool = False,
+    profile: bool = False,
+    prometheus_path: Path | None = None,
+    cache_path: Path | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Ingest the benchmarks of projects in asv-collection.
 
-    timer = time.time()
-    cmd = f"cd {tmpdir.name} && git clone {asv_collection_url} --depth 1 asv_collection"
-    subprocess.run(cmd, shell=True, capture_output=True, check=True)
-    print(time.time() - timer)
+    All projects are synced in one mirror, then processed concurrently with up
+    to workers processes. Each project has its own cache, ``<project>`` in the
+    cache directory, which ``Watcher(project=...)`` opens.
 
-    benchmark_path = Path(tmpdir.name) / "asv_collection" / "pandas"
-    benchmarks = process_benchmarks(benchmark_path, window_size)
-    summary = summarize_regressions(benchmarks)
+    Args:
+        asv_collection_url: URL of the asv-collection repository.
+        projects: Directories of the projects in the collection, e.g.
+            ["pandas"]. Defaults to every directory with an index.json.
+        write: Whether to write the cache of each project.
+        window_size: Window size of the detector.
+        incremental: Whether to reuse the cache of a previous run.
+        workers: Number of processes; projects are processed in parallel and
+            the remaining processes parse each project's graph files.
+        mirror_path: Directory of the mirror. Defaults to ``asv_collection``
+            in the cache directory.
+        statistics: Whether to add the spread of each timing's samples.
+        profile: Whether to write a report of the run's stages to
+            ``profile.json`` in the cache directory.
+        prometheus_path: Where to also write the report as a Prometheus
+            textfile, when profiling.
+        cache_path: Cache directory. Defaults to the repository's .cache.
 
-    if write:
+    Returns:
+        The benchmarks of each project.
+    """
+    if cache_path is None:
         cache_path = Path(__file__).parent / ".." / ".." / ".cache"
-        write_cache(cache_path, summary, benchmarks)
+    if mirror_path is None:
+        mirror_path = cache_path / "asv_collection"
+    profiler = Profiler() if profile else NULL_PROFILER
+
+    with profiler.stage("sync"):
+        projects, commit = sync_collection(asv_collection_url, mirror_path, projects)
+
+    n_processes = min(workers, len(projects))
+    tasks = [
+        (
+            project,
+            mirror_path,
+            cache_path / project,
+            {
+                "window_size": window_size,
+                "incremental": incremental,
+                "write": write,
+                "workers": max(workers // max(n_processes, 1), 1),
+                "collection_commit": commit,
+                "statistics": statistics,
+                "profile": profile,
+            },
+        )
+        for project in projects
+    ]
+    with profiler.stage("update"):
+        if n_processes > 1:
+            context = multiprocessing.get_context("forkserver")
+            with concurrent.futures.ProcessPoolExecutor(
+                n_processes, mp_context=context
+            ) as executor:
+                loaded = list(executor.map(update_project, tasks))
+        else:
+            loaded = [update_project(task) for task in tasks]
+
+    result = {}
+    for project, (benchmarks, report) in zip(projects, loaded):
+        result[project] = benchmarks
+        if report is not None:
+            profiler.attach(report)
+
+    if profile:
+        report = profiler.report()
+        write_report(cache_path / "profile.json", report)
+        if prometheus_path is not None:
+            write_prometheus(prometheus_path, report)
+
+    return result
 
-    return benchmarks
 
+def update_project(
+    task: tuple[str, Path, Path, dict[str, Any]],
+) -> tuple[pd.DataFrame, dict[str, Any] | None]:
+    """Ingest the benchmarks of one project, as part of ``run``.
 
-def write_cache(path: Path, summary: pd.DataFrame, benchmarks: pd.DataFrame) -> None:
-    os.makedirs(path, exist_ok=True)
-    summary.to_parquet(path / "summary.parquet")
-    benchmarks.to_parquet(path / "benchmarks.parquet")
+    Args:
+        task: The project's name, the mirror of asv-collection, the project's
+            cache directory and the keyword arguments of ``run`` that apply to
+            it, with the commit the mirror is at.
+
+    Returns:
+        The benchmarks of the project, and the report of its stages when
+        profiling.
+    """
+    project, mirror_path, cache_path, options = task
+    profiler = Profiler(project) if options["profile"] else NULL_PROFILER
+
+    previous, manifest, candidates = None, None, None
+    if options["incremental"]:
+        with profiler.stage("read_cache"):
+            previous, manifest = read_cache(cache_path)
+        if manifest is not None:
+            # Only files changed since the commit the cache was built from.
+            candidates = collection_changes(
+                mirror_path,
+                project,
+                manifest.get("collection_commit"),
+                options["collection_commit"],
+            )
+
+    with profiler.stage("update"):
+        benchmarks, manifest = update_benchmarks(
+            mirror_path / project,
+            options["window_size"],
+            previous,
+            manifest,
+            workers=options["workers"],
+            candidates=candidates,
+            statistics=options["statistics"],
+            profiler=profiler,
+        )
+    manifest["collection_commit"] = options["collection_commit"]
+    if options["write"]:
+        with profiler.stage("write_cache"):
+            write_cache(cache_path, benchmarks, manifest)
+
+    report = profiler.report() if options["profile"] else None
+    return benchmarks, report
+
+
+def discover_projects(path: Path, commit: str = "HEAD") -> list[str]:
+    """Find the projects in a mirror of asv-collection.
+
+    Projects are the top-level directories with an index.json. Only the git
+    trees are read, so the mirror does not need to have them checked out.
+
+    Args:
+        path: Directory of the mirror.
+        commit: Commit of the collection.
+
+    Returns:
+        The directory of each project, sorted.
+    """
+
+    def git(*args: str) -> str:
+        response = subprocess.run(
+            ["git", "-C", str(path), *args], capture_output=True, check=True, text=True
+        )
+        return response.stdout
+
+    directories = git("ls-tree", "-d", "--name-only", commit).splitlines()
+    if len(directories) == 0:
+        return []
+    candidates = [f"{directory}/index.json" for directory in directories]
+    response = git("ls-tree", "--name-only", commit, "--", *candidates)
+    result = sorted(str(Path(filename).parent) for filename in response.splitlines())
+    return result
+
+
+def sync_collection(
+    url: str, path: Path, projects: list[str] | None = None
+) -> tuple[list[str], str]:
+    """Clone or update a local mirror of asv-collection.
+
+    The mirror is a shallow clone with a sparse checkout of the projects'
+    directories only. Later calls fetch the latest commit and move the mirror to
+    it, leaving unchanged files untouched on disk.
+
+    Args:
+        url: URL of the asv-collection repository.
+        path: Directory of the mirror.
+        projects: Subdirectories of the projects, e.g. ["pandas"]. Defaults to
+            those found by ``discover_projects``.
+
+    Returns:
+        The projects, and the commit of the collection the mirror is now at.
+
+    Raises:
+        ValueError: If a project is not in the collection.
+    """
+
+    def git(*args: str) -> str:
+        response = subprocess.run(
+            ["git", "-C", str(path), *args], capture_output=True, check=True, text=True
+        )
+        return response.stdout
+
+    if not (path / ".git").exists():
+        os.makedirs(path.parent, exist_ok=True)
+        subprocess.run(
+            [
+                "git",
+                "clone",
+                "--depth",
+                "1",
+                "--filter=blob:none",
+                "--no-checkout",
+                url,
+                str(path),
+            ],
+            capture_output=True,
+            check=True,
+        )
+        commit = git("rev-parse", "HEAD").strip()
+    else:
+        git("fetch", "--depth", "1", "origin")
+        commit = git("rev-parse", "FETCH_HEAD").strip()
+
+    available = discover_projects(path, commit)
+    if projects is None:
+        projects = available
+    missing = sorted(set(projects) - set(available))
+    if len(missing) > 0:
+        raise ValueError(f"Projects not in the collection: {', '.join(missing)}")
+    git("sparse-checkout", "set", *projects)
+    # The shallow fetch does not connect successive commits, so move the mirror
+    # instead of merging; the mirror is never modified locally.
+    git("reset", "--hard", commit)
+    return projects, commit
+
+
+def collection_changes(
+    path: Path, project: str, old: str | None, new: str
+) -> set[str] | None:
+    """Files of a project that changed between two commits of asv-collection.
+
+    The commits' trees are read from the mirror, where earlier commits remain
+    after each sync; an old commit that is no longer there is fetched.
+
+    Args:
+        path: Directory of the mirror.
+        project: Subdirectory of the project.
+        old: Commit the project's cache was built from, e.g. the
+            "collection_commit" of its manifest.
+        new: Commit the mirror is at.
+
+    Returns:
+        The paths, relative to the project's directory, of the changed files, or
+        None if the old commit is unknown or cannot be fetched.
+    """
+
+    def git(*args: str) -> bytes:
+        response = subprocess.run(
+            ["git", "-C", str(path), *args], capture_output=True, check=True
+        )
+        return response.stdout
+
+    if old is None:
+        return None
+    try:
+        git("cat-file", "-e", f"{old}^{{tree}}")
+    except subprocess.CalledProcessError:
+        try:
+            git("fetch", "--depth", "1", "origin", old)
+        except subprocess.CalledProcessError:
+            return None
+
+    # Paths are NUL-terminated, so that git does not quote unusual characters.
+    changed = git("diff", "-z", "--name-only", old, new, "--", project)
+    result = {
+        os.fsdecode(filename).split("/", 1)[1]
+        for filename in changed.split(b"\0")
+        if filename
+    }
+    return result
 
 
 def read_index_data(benchmark_path: Path) -> dict[str, dict[str, Any]]:
@@ -49,147 +317,725 @@ def read_index_data(benchmark_path: Path) -> dict[str, dict[str, Any]]:
     return result
 
 
-def determine_benchmark_prefixes(benchmark_path: Path) -> set[Path]:
-    # TODO: Use index json graph_param_list
-    paths = set()
-    for path in (benchmark_path / "graphs").glob("**/*.json"):
-        if "summary" in str(path):
+def graph_prefix(params: dict[str, str | None]) -> str:
+    """Directory of the graphs for a set of machine and environment parameters.
+
+    This mirrors how asv lays out ``graphs/``: one ``key-value`` component per
+    parameter, in sorted order of the keys, sanitized to be a valid filename.
+
+    Args:
+        params: An entry of ``graph_param_list`` in index.json.
+
+    Returns:
+        The prefix relative to the graphs directory.
+    """
+    parts = []
+    for key, value in sorted(params.items()):
+        if value is None:
+            part = f"{key}-null"
+        elif value:
+            part = f"{key}-{value}"
+        else:
+            part = key
+        part = re.sub(r'[<>:"/\\^|?*\x00-\x1f]', "_", part)
+        part = re.sub(r"[ .]$", "_", part)
+        parts.append(part)
+    return os.path.join(*parts)
+
+
+def environment_names(graph_param_list: list[dict[str, str | None]]) -> list[str]:
+    """Name each set of machine and environment parameters.
+
+    Names are made of the machine along with the parameters that differ
+    between the sets, e.g. "machine=runner-1; python=3.10".
+
+    Args:
+        graph_param_list: The ``graph_param_list`` of index.json.
+
+    Returns:
+        The name of each entry of graph_param_list.
+    """
+    keys = sorted({key for params in graph_param_list for key in params})
+    varying = [
+        key
+        for key in keys
+        if key == "machine" or len({params.get(key) for params in graph_param_list}) > 1
+    ]
+    result = [
+        "; ".join(f"{key}={params.get(key)}" for key in varying if key in params)
+        for params in graph_param_list
+    ]
+    return result
+
+
+def determine_benchmark_prefixes(
+    benchmark_path: Path, index_data: dict[str, Any]
+) -> dict[Path, set[str]]:
+    """Determine the directories containing graph files.
+
+    Args:
+        benchmark_path: Path to the project's asv results.
+        index_data: Contents of index.json.
+
+    Returns:
+        Mapping from each existing directory to the names of the files it
+        contains, in the order of ``graph_param_list``.
+    """
+    result = {}
+    for params in index_data["graph_param_list"]:
+        prefix = benchmark_path / "graphs" / graph_prefix(params)
+        try:
+            with os.scandir(prefix) as entries:
+                result[prefix] = {entry.name for entry in entries}
+        except FileNotFoundError:
             continue
-        paths.add(path.parent)
-    return paths
+    return result
 
 
 def process_benchmarks(
     benchmark_path: Path,
     window_size: int,
+    workers: int = 1,
+    detector: Detector | None = None,
 ) -> pd.DataFrame:
+    result, _ = update_benchmarks(
+        benchmark_path, window_size, workers=workers, detector=detector
+    )
+    return result
+
+
+def file_state(path: Path) -> dict[str, Any]:
+    """Identify the contents of a graph file.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        The modification time, size and SHA-256 digest of the file.
+    """
+    stat = path.stat()
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+
+
+def changed_files(
+    benchmark_path: Path,
+    index_data: dict[str, Any],
+    manifest: dict[str, Any],
+    candidates: set[str] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Determine the graph files that are new or changed since the manifest.
+
+    The file is only hashed when its modification time or size differs from the
+    manifest, so unchanged files only cost a ``stat``.
+
+    Args:
+        benchmark_path: Path to the project's asv results.
+        index_data: Contents of index.json.
+        manifest: Manifest of the previous run.
+        candidates: Paths, relative to benchmark_path, of the only files that
+            may have changed, e.g. as reported by ``collection_changes``. Defaults
+            to all files.
+
+    Returns:
+        Mapping from the path of each new or changed file, relative to
+        benchmark_path, to its state. The state includes the last revision that
+        was ingested from the file, or -1 if the file is new.
+    """
+    previous = manifest["files"]
+    result = {}
+    prefixes = determine_benchmark_prefixes(benchmark_path, index_data)
+    for prefix, filenames in prefixes.items():
+        for name in index_data["benchmarks"]:
+            if f"{name}.json" not in filenames:
+                continue
+            path = prefix / f"{name}.json"
+            key = str(path.relative_to(benchmark_path))
+            if candidates is not None and key not in candidates:
+                continue
+            stat = path.stat()
+            entry = previous.get(key)
+            if (
+                entry is not None
+                and entry["mtime_ns"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size
+            ):
+                continue
+            state = file_state(path)
+            if entry is not None and entry["sha256"] == state["sha256"]:
+                continue
+            if entry is not None:
+                state["revision"] = entry["revision"]
+                state["revisions_digest"] = entry.get("revisions_digest")
+            else:
+                state["revision"] = -1
+            result[key] = state
+    return result
+
+
+def update_benchmarks(
+    benchmark_path: Path,
+    window_size: int,
+    previous: pd.DataFrame | None = None,
+    manifest: dict[str, Any] | None = None,
+    workers: int = 1,
+    candidates: set[str] | None = None,
+    detector: Detector | None = None,
+    statistics: bool = False,
+    profiler: Profiler | NullProfiler = NULL_PROFILER,
+) -> tuple[pd.DataFrame, dict[str, Any]]:
+    """Process benchmarks, reusing the results of a previous run when available.
+
+    When previous and manifest are provided, only graph files that are new or
+    changed according to the manifest are parsed, and only revisions after the
+    last one ingested from each file are added. Regressions are then recomputed
+    over the trailing window of the affected series; all other rows are reused
+    as-is.
+
+    Args:
+        benchmark_path: Path to the project's asv results.
+        window_size: Window size of the detector.
+        previous: Benchmarks computed by a previous run.
+        manifest: Manifest returned alongside previous.
+        workers: Number of processes used to parse the graph files.
+        candidates: Paths, relative to benchmark_path, of the only files that
+            may have changed since the manifest. Defaults to all files.
+        detector: Detector of regressions. Defaults to a RollingDetector with
+            window_size. Only the default detector reuses previous results;
+            other detectors always process every file.
+        statistics: Whether to add the spread of each timing's samples from
+            the asv results, where available. See ``load_statistics``.
+        profiler: Profiler recording the stages of the update.
+
+    Returns:
+        The benchmarks along with the manifest describing the ingested files.
+    """
     index_data = read_index_data(benchmark_path)
-    benchmark_url_prefixes = determine_benchmark_prefixes(benchmark_path)
+    if (
+        previous is None
+        or manifest is None
+        or manifest.get("window_size") != window_size
+        or manifest.get("statistics", False) != statistics
+        or detector is not None
+    ):
+        with profiler.stage("discover"):
+            prefixes = determine_benchmark_prefixes(benchmark_path, index_data)
+            files = {
+                str(path.relative_to(benchmark_path)): {
+                    **file_state(path),
+                    "revision": -1,
+                }
+                for prefix, filenames in prefixes.items()
+                for path in (prefix / filename for filename in sorted(filenames))
+            }
+        data = load_benchmarks(
+            benchmark_path, index_data, files, workers, statistics, profiler
+        )
+        with profiler.stage("detect"):
+            result = detect_regressions(data, window_size, detector)
+        with profiler.stage("format"):
+            result = util.format_benchmarks(result)
+    else:
+        with profiler.stage("discover"):
+            files = changed_files(benchmark_path, index_data, manifest, candidates)
+        data = load_benchmarks(
+            benchmark_path, index_data, files, workers, statistics, profiler
+        )
+        with profiler.stage("extend"):
+            result = extend_benchmarks(previous, data, window_size)
+        files = {**manifest["files"], **files}
+    profiler.count("regressions", result["is_regression"].sum())
+    manifest = {
+        # Identify the project for links in reports.
+        "project": benchmark_path.name,
+        "show_commit_url": index_data.get("show_commit_url"),
+        "window_size": window_size,
+        "statistics": statistics,
+        "files": files,
+    }
+    return result, manifest
+
+
+def load_benchmarks(
+    benchmark_path: Path,
+    index_data: dict[str, Any],
+    files: dict[str, dict[str, Any]],
+    workers: int = 1,
+    statistics: bool = False,
+    profiler: Profiler | NullProfiler = NULL_PROFILER,
+    backend: str | None = None,
+) -> pd.DataFrame:
+    """Load the raw benchmark timings from graph files.
+
+    Args:
+        benchmark_path: Path to the project's asv results.
+        index_data: Contents of index.json.
+        files: Mapping from the path of each file to read, relative to
+            benchmark_path, to its state. Only revisions after the state's
+            "revision" are loaded, unless revisions up to it were added since
+            they were loaded, as recorded by "revisions_digest". Both are
+            updated in place.
+        workers: Number of processes used to parse the graph files. Results are
+            identical regardless of the number of workers.
+        statistics: Whether to add the "spread" of each timing from
+            ``load_statistics``.
+        profiler: Profiler recording the stages of the load.
+        backend: JSON decoder of the graph files, see ``read_graph``.
+
+    Returns:
+        Timings indexed by name, params, env and revision. The environment, a
+        categorical named by ``environment_names``, identifies the machine and
+        dependencies the timing was measured with.
+    """
+    graph_param_list = index_data["graph_param_list"]
+    env_names = dict(
+        zip(
+            (graph_prefix(params) for params in graph_param_list),
+            environment_names(graph_param_list),
+        )
+    )
+    benchmark_url_prefixes = determine_benchmark_prefixes(benchmark_path, index_data)
+    envs = [
+        env_names[str(prefix.relative_to(benchmark_path / "graphs"))]
+        for prefix in benchmark_url_prefixes
+    ]
     benchmarks = index_data["benchmarks"]
-    revision_to_date = index_data["revision_to_date"]
 
-    results = {}
+    tasks = []
     for name, benchmark in benchmarks.items():
-        parameter_collection = ParameterCollection(
-            benchmark["param_names"], benchmark["params"]
+        graph_files = []
+        for prefix, env in zip(benchmark_url_prefixes, envs):
+            graph_path = prefix / f"{name}.json"
+            key = str(graph_path.relative_to(benchmark_path))
+            if key in files:
+                graph_files.append((graph_path, key, files[key], env))
+        if len(graph_files) > 0:
+            tasks.append((name, benchmark, graph_files))
+
+    load = functools.partial(
+        load_benchmark,
+        revision_to_date=index_data["revision_to_date"],
+        revision_to_hash=index_data["revision_to_hash"],
+        backend=backend,
+    )
+    with profiler.stage("parse"):
+        profiler.count("files", sum(len(task[2]) for task in tasks))
+        profiler.count(
+            "bytes",
+            sum(
+                files[key].get("size", 0) for task in tasks for _, key, _, _ in task[2]
+            ),
         )
+        if workers > 1:
+            chunksize = max(len(tasks) // (4 * workers), 1)
+            # Forking after numba started its threading layer, e.g. for
+            # PeltDetector, deadlocks the children.
+            context = multiprocessing.get_context("forkserver")
+            with concurrent.futures.ProcessPoolExecutor(
+                workers, mp_context=context
+            ) as executor:
+                loaded = list(executor.map(load, tasks, chunksize=chunksize))
+        else:
+            loaded = [load(task) for task in tasks]
 
-        buffer = []
-        for prefix in benchmark_url_prefixes:
-            # TODO: Use Path object
-            benchmark_path = Path(prefix) / f"{name}.json"
-            try:
-                with open(benchmark_path) as f:
-                    buffer.append(json.load(f))
-            except FileNotFoundError:
-                # TODO: Why does this happen?
-                # print(f"Error in reading {benchmark_path}")
-                continue
-        json_data: list[str] = sum(buffer, [])
-        if len(json_data) == 0:
-            # TODO: Why does this happen?
-            # print(benchmark, "has no data. Skipping.")
-            continue
+    results = {}
+    for name, (df, revisions) in zip((task[0] for task in tasks), loaded):
+        if df is not None:
+            results[name] = df
+        for key, state in revisions.items():
+            files[key].update(state)
+
+    env_dtype = pd.CategoricalDtype(list(dict.fromkeys(env_names.values())))
+    if len(results) == 0:
+        index = pd.MultiIndex.from_arrays(
+            [[], [], pd.Categorical([], dtype=env_dtype), pd.Index([], dtype=int)],
+            names=["name", "params", "env", "revision"],
+        )
+        result = pd.DataFrame(
+            {"time": [], "git_hash": [], "date": pd.Series([], dtype=object)},
+            index=index,
+        )
+        if statistics:
+            result["spread"] = np.array([], dtype=np.float32)
+        return result
 
-        df = extract_benchmark_data(
-            json_data, parameter_collection, revision_to_date, index_data
+    with profiler.stage("concat"):
+        data = pd.concat(results, names=["name", None]).droplevel(-1)
+        data["env"] = data["env"].astype(env_dtype)
+        result = (
+            data.rename(columns={"commit_hash": "git_hash"})
+            .set_index(["params", "env", "revision"], append=True)
+            .sort_index()
         )
-        if df.empty:
+        profiler.count("rows", len(result))
+    if statistics:
+        with profiler.stage("statistics"):
+            spread = load_statistics(
+                benchmark_path, index_data, set(result["git_hash"].dropna())
+            )
+            spread.index = spread.index.set_levels(
+                spread.index.levels[2].astype(env_dtype), level="env"
+            )
+            result["spread"] = spread.reindex(result.index).to_numpy(dtype=np.float32)
+    return result
+
+
+def load_statistics(
+    benchmark_path: Path, index_data: dict[str, Any], hashes: set[str]
+) -> pd.Series:
+    """Load the spread of the samples behind each timing from asv results.
+
+    asv stores the quartiles of the samples of each benchmark in the results
+    files, ``results/<machine>/<hash>-<env>.json``. The spread of a timing is
+    their interquartile range relative to the timing. Results files in asv's
+    older format, without quartiles, are skipped.
+
+    Args:
+        benchmark_path: Path to the project's asv results.
+        index_data: Contents of index.json.
+        hashes: Commit hashes of the timings whose spread is needed; other
+            results files are not read.
+
+    Returns:
+        The spread of each timing, indexed by name, params, env and revision.
+    """
+    graph_param_list = index_data["graph_param_list"]
+    env_names = environment_names(graph_param_list)
+    hash_to_revision = {
+        commit_hash: int(revision)
+        for revision, commit_hash in index_data["revision_to_hash"].items()
+    }
+    # asv names results files by the first 8 characters of the commit hash.
+    prefixes = {commit_hash[:8] for commit_hash in hashes}
+
+    frames = []
+    results_path = benchmark_path / "results"
+    paths = sorted(results_path.glob("*/*.json")) if results_path.exists() else []
+    for path in paths:
+        if path.name.split("-", 1)[0] not in prefixes:
+            continue
+        with open(path) as f:
+            results = json.load(f)
+        revision = hash_to_revision.get(results.get("commit_hash"))
+        columns = results.get("result_columns")
+        if revision is None or columns is None:
             continue
+        # The graph directories of the results also include e.g. the branch.
+        envs = [
+            env
+            for params, env in zip(graph_param_list, env_names)
+            if all(
+                str(params[key]) == str(value)
+                for key, value in results.get("params", {}).items()
+                if key in params
+            )
+        ]
+        for name, row in results["results"].items():
+            benchmark = index_data["benchmarks"].get(name)
+            entry = dict(zip(columns, row))
+            if benchmark is None or entry.get("stats_q_25") is None:
+                continue
+            times = np.array(entry["result"], dtype=float)
+            q_25 = np.array(entry["stats_q_25"], dtype=float)
+            q_75 = np.array(entry["stats_q_75"], dtype=float)
+            parameter_collection = ParameterCollection(
+                benchmark["param_names"], benchmark["params"]
+            )
+            n = min(len(times), len(parameter_collection))
+            spread = ((q_75 - q_25) / times)[:n]
+            for env in envs:
+                frames.append(
+                    pd.DataFrame(
+                        {
+                            "name": name,
+                            "params": parameter_collection.param_strings(stop=n),
+                            "env": env,
+                            "revision": revision,
+                            "spread": spread,
+                        }
+                    )
+                )
 
-        param_names = benchmark["param_names"]
-        if len(param_names) > 0:
-            keys = param_names if len(param_names) > 1 else param_names[0]
-            for param_combo, d in df.groupby(keys):
-                param_string = make_param_string(param_names, param_combo)
-                results[name, param_string] = d
-        else:
-            results[name, ""] = df
+    if len(frames) == 0:
+        columns = {"name": [], "params": [], "env": [], "revision": [], "spread": []}
+        frames.append(pd.DataFrame(columns).astype({"revision": int}))
+    result = pd.concat(frames, ignore_index=True).set_index(
+        ["name", "params", "env", "revision"]
+    )["spread"]
+    # A commit benchmarked twice on a machine keeps its first results.
+    result = result[~result.index.duplicated()].astype(np.float32)
+    return result
 
-    data = (
-        pd.concat(
-            {
-                k: v[["revision", "date", "time", "commit_hash"]]
-                for k, v in results.items()
-            }
+
+def load_benchmark(
+    task: tuple[str, dict[str, Any], list[tuple[Path, str, dict[str, Any], str]]],
+    revision_to_date: dict[str, int],
+    revision_to_hash: dict[str, str],
+    backend: str | None = None,
+) -> tuple[pd.DataFrame | None, dict[str, dict[str, Any]]]:
+    """Load the timings of a single benchmark from its graph files.
+
+    Args:
+        task: The benchmark's name, its entry in index.json, and the graph files
+            to read. Each file is given as its path, its key in the manifest, its
+            state in the manifest and its environment.
+        revision_to_date: Mapping from revision to commit timestamp.
+        revision_to_hash: Mapping from revision to commit hash.
+        backend: JSON decoder of the graph files, see ``read_graph``.
+
+    Returns:
+        Timings as returned by ``extract_benchmark_data`` along with the env of
+        each, or None if there are none, and the last revision and the digest
+        of the revisions in each graph file that was read.
+    """
+    _, benchmark, graph_files = task
+    parameter_collection = ParameterCollection(
+        benchmark["param_names"], benchmark["params"]
+    )
+
+    revisions: dict[str, dict[str, Any]] = {}
+    graphs = []
+    envs = []
+    for graph_path, key, state, env in graph_files:
+        graph = read_graph(
+            graph_path,
+            len(parameter_collection),
+            state["revision"],
+            backend,
+            state.get("revisions_digest"),
         )
-        .rename(columns={"commit_hash": "git_hash"})
-        .droplevel(-1)
+        if graph.last_revision is not None:
+            revisions[key] = {
+                "revision": graph.last_revision,
+                "revisions_digest": graph.digest,
+            }
+        if len(graph.times) == 0:
+            # TODO: Why does this happen?
+            continue
+        graphs.append(graph)
+        envs.append(env)
+    if len(graphs) == 0:
+        return None, revisions
+    result = graph_frame(
+        concat_graphs(graphs), parameter_collection, revision_to_date, revision_to_hash
     )
-    data.index.names = ["name", "params"]
-    data["revision"] = data["revision"].astype(int)
-    data = data.set_index("revision", append=True).sort_index()
-    # I think this is due to different dependencies. We should maybe have
-    # dependencies as part of the index
-    result = data.groupby(["name", "params", "revision"], dropna=False).agg(
-        {"time": "mean", "git_hash": "first", "date": "first"}
+    result.insert(
+        1,
+        "env",
+        np.repeat(np.array(envs, dtype=object), [len(g.times) for g in graphs]),
     )
+    return result, revisions
 
-    detector = RollingDetector(window_size=window_size)
-    result = detector.detect_regression(result)
 
-    for c in ["pct_change", "abs_change", "time"]:
-        result[f"{c}_value"] = result[c]
-    result["pct_change"] = result["pct_change"].apply(lambda x: f"{x:0.3%}")
-    result["time"] = result["time"].apply(util.time_to_str)
-    result["abs_change"] = result["abs_change"].apply(util.time_to_str)
+def detect_regressions(
+    data: pd.DataFrame, window_size: int, detector: Detector | None = None
+) -> pd.DataFrame:
+    """Detect regressions in each environment, then confirm them across all.
 
-    result = result.sort_index()
+    Args:
+        data: Timings, as returned by ``load_benchmarks``.
+        window_size: Window size of the default detector.
+        detector: Detector of regressions. Defaults to a RollingDetector with
+            window_size.
 
+    Returns:
+        The timings with the detector's results. "detected" is whether the
+        detector flagged the timing in its environment, and "is_regression"
+        whether that is confirmed by ``consensus``.
+    """
+    if detector is None:
+        detector = RollingDetector(window_size=window_size)
+    result = detector.detect_regression(data)
+    result = consensus(result.rename(columns={"is_regression": "detected"}))
     return result
 
 
-def summarize_regressions(benchmarks):
-    result = (
-        benchmarks[benchmarks.is_regression]
-        .reset_index()
-        .groupby("git_hash", as_index=False)
-        .agg(
-            date=("date", "first"),
-            benchmarks=("name", "size"),
-            pct_change_max_value=("pct_change_value", "max"),
-            abs_change_max_value=("abs_change_value", "max"),
-            pct_change_mean_value=("pct_change_value", "mean"),
-            abs_change_mean_value=("abs_change_value", "mean"),
-        )
-        .sort_values(by="date", ascending=False)
-        .set_index("git_hash", drop=False)
+def consensus(data: pd.DataFrame, quorum: float = 0.5, radius: int = 3) -> pd.DataFrame:
+    """Confirm regressions detected in single environments across environments.
+
+    Runners don't all benchmark the same commits, so a regression detected in
+    one environment is compared with the environments that have timings of the
+    same benchmark within radius revisions of it. It is confirmed when at least
+    two of those detected a regression within that range, and they are more than
+    a quorum of them. A detection with no other environment measured nearby,
+    e.g. before a runner joined, has nothing to compare with and is confirmed
+    as-is.
+
+    Args:
+        data: Timings with a "detected" column, indexed by name, params, env and
+            revision.
+        quorum: Fraction of the environments that must be exceeded.
+        radius: Distance in revisions within which detections agree.
+
+    Returns:
+        The timings with the fraction of environments agreeing on each detected
+        regression as "agreement", zero elsewhere, and the confirmed
+        regressions as "is_regression".
+    """
+    keys = (
+        data.groupby(level=["name", "params"], sort=False, observed=True)
+        .ngroup()
+        .to_numpy()
     )
-    for c in ["pct_change_max", "pct_change_mean"]:
-        result[c] = result[f"{c}_value"].apply(lambda x: f"{x:0.3%}")
-    for c in ["abs_change_max", "abs_change_mean"]:
-        result[c] = result[f"{c}_value"].apply(util.time_to_str)
+    envs, _ = pd.factorize(data.index.get_level_values("env"))
+    revisions = data.index.get_level_values("revision").to_numpy()
+    detected = data["detected"].to_numpy(dtype=bool)
+
+    # Timings ordered by benchmark, then revision.
+    order = np.lexsort((revisions, keys))
+    sorted_keys = keys[order]
+    sorted_revisions = revisions[order]
+    sorted_envs = envs[order]
+    sorted_detected = detected[order]
+
+    agreement = np.zeros(len(data))
+    is_regression = np.zeros(len(data), dtype=bool)
+    for i in np.flatnonzero(detected):
+        start = np.searchsorted(sorted_keys, keys[i], "left")
+        stop = np.searchsorted(sorted_keys, keys[i], "right")
+        window = sorted_revisions[start:stop]
+        lo = start + np.searchsorted(window, revisions[i] - radius, "left")
+        hi = start + np.searchsorted(window, revisions[i] + radius, "right")
+        n_envs = len(np.unique(sorted_envs[lo:hi]))
+        n_agree = len(np.unique(sorted_envs[lo:hi][sorted_detected[lo:hi]]))
+        agreement[i] = n_agree / n_envs
+        is_regression[i] = n_envs == 1 or (n_agree >= 2 and agreement[i] > quorum)
+    data["agreement"] = agreement
+    data["is_regression"] = is_regression
+    return data
+
+
+def extend_benchmarks(
+    previous: pd.DataFrame, data: pd.DataFrame, window_size: int
+) -> pd.DataFrame:
+    """Add newly loaded timings to previously processed benchmarks.
+
+    The rolling detector's result for a revision only depends on the timings
+    within a few windows of it. For each affected series, detection is rerun on
+    the new timings along with ``3 * window_size`` of the preceding timings, and
+    only the results that could have changed are replaced.
+
+    Args:
+        previous: Benchmarks computed by a previous run.
+        data: Newly loaded timings, as returned by ``load_benchmarks``.
+        window_size: Window size of the detector.
+
+    Returns:
+        The updated benchmarks.
+    """
+    keys = ["name", "params", "env"]
+    # Revisions already ingested are kept as-is.
+    data = data[~data.index.isin(previous.index)]
+    if data.empty:
+        return previous
+
+    columns = ["time_value", "git_hash", "date"]
+    if "spread" in previous:
+        columns.append("spread")
+    raw = previous[columns].rename(columns={"time_value": "time"})
+    start = data.reset_index("revision").groupby(keys)["revision"].min()
+    medians = None
+    if "spread" in raw:
+        # The tolerance of every row depends on the median spread of its whole
+        # series, so series whose median changes are recomputed in full.
+        spread = pd.concat([raw["spread"], data["spread"]])
+        medians = spread.groupby(keys, observed=True).median().reindex(start.index)
+        old = raw["spread"].groupby(keys, observed=True).median()
+        old = old.reindex(start.index)
+        changed = (medians != old) & ~(medians.isna() & old.isna())
+        start = start.where(~changed, -1)
+    raw_start = start.reindex(raw.index.droplevel("revision")).to_numpy()
+    revisions = raw.index.get_level_values("revision").to_numpy()
+    affected = ~pd.isna(raw_start)
+
+    before = raw[affected & (revisions < raw_start)]
+    context_size = 3 * window_size
+    context = before.groupby(keys).tail(context_size)
+    after = raw[affected & (revisions >= raw_start)]
+    combined = pd.concat([context, after, data]).sort_index()
+    if medians is not None:
+        combined["spread_median"] = medians.reindex(
+            combined.index.droplevel("revision")
+        ).to_numpy()
+
+    result = detect_regressions(combined, window_size)
+    result = result.drop(columns="spread_median", errors="ignore")
+
+    # Series whose history was truncated only have trustworthy results starting
+    # window_size rows before their first recomputed revision.
+    n_context = context.groupby(keys).size()
+    truncated = before.groupby(keys).size() > n_context
+    first_valid = (n_context - window_size).where(truncated, 0)
+    first_valid = first_valid.reindex(
+        result.index.droplevel("revision"), fill_value=0
+    ).to_numpy()
+    result = result[result.groupby(keys).cumcount().to_numpy() >= first_valid]
+
+    result = util.format_benchmarks(result)
+    result = pd.concat([previous[~previous.index.isin(result.index)], result])
+    # Other environments may have timings of the recomputed revisions.
+    result = consensus(result.sort_index())
     return result
 
 
 def extract_benchmark_data(
     json_data, parameter_collection, revision_to_date, index_data
 ):
-    revisions, times = list(zip(*json_data))
+    """Flatten the contents of graph files into one row per revision and params.
 
-    data = []
-    for revision, revision_times in zip(revisions, times):
-        if revision_times is None:
-            # TODO: Not sure why this happens...
-            continue
-        elif isinstance(revision_times, float):
-            # Benchmark has no arguments
-            revision_times = [revision_times]
-        for param_combo, seconds in zip(parameter_collection._params, revision_times):
-            data_inner = param_combo.to_dict()
-            data_inner["revision"] = str(revision)
-            date = revision_to_date.get(str(revision), pd.NaT)
-            if not pd.isna(date):
-                date = datetime.datetime.fromtimestamp(date / 1000.0, tz=pytz.utc)
-            data_inner["date"] = date
-            data_inner["time"] = seconds
-            data.append(data_inner)
-    if len(data) == 0:
+    Args:
+        json_data: Concatenated contents of the benchmark's graph files, a list of
+            [revision, times] pairs.
+        parameter_collection: Parameters of the benchmark.
+        revision_to_date: Mapping from revision to commit timestamp in ms.
+        index_data: Contents of index.json.
+
+    Returns:
+        The params string, revision, date, time and commit_hash of each timing.
+    """
+    graph = graph_arrays(json_data, len(parameter_collection))
+    if len(graph.times) == 0:
         # TODO: Why does this happen?
         return pd.DataFrame()
-    df = pd.DataFrame(data)
-    df["commit_hash"] = df["revision"].map(index_data["revision_to_hash"])
-    return df
+    result = graph_frame(
+        graph, parameter_collection, revision_to_date, index_data["revision_to_hash"]
+    )
+    return result
+
+
+def graph_frame(
+    graph: GraphData,
+    parameter_collection: ParameterCollection,
+    revision_to_date: dict[str, int],
+    revision_to_hash: dict[str, str],
+) -> pd.DataFrame:
+    """Make one row per timing of graph files, as read by ``read_graph``.
+
+    Args:
+        graph: Timings of the benchmark's graph files.
+        parameter_collection: Parameters of the benchmark.
+        revision_to_date: Mapping from revision to commit timestamp in ms.
+        revision_to_hash: Mapping from revision to commit hash.
+
+    Returns:
+        The params string, revision, date, time and commit_hash of each timing.
+    """
+    result = {"params": parameter_collection.param_strings()[graph.combos]}
+
+    # Dates and hashes are looked up once per distinct revision.
+    unique, inverse = np.unique(graph.revisions, return_inverse=True)
+    timestamps = np.array(
+        [revision_to_date.get(str(e), np.nan) for e in unique], dtype=float
+    )
+    dates = pd.to_datetime(timestamps, unit="ms", utc=True).as_unit("us")
+    hashes = np.array([revision_to_hash.get(str(e)) for e in unique], dtype=object)
+
+    result["revision"] = graph.revisions
+    result["date"] = dates[inverse]
+    result["time"] = graph.times
+    result["commit_hash"] = hashes[inverse]
+    return pd.DataFrame(result)
 
 
 def make_param_string(
@@ -204,6 +1050,36 @@ def make_param_string(
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--url", default="https://github.com/asv-runner/asv-collection.git"
+    )
+    parser.add_argument(
+        "--project",
+        action="append",
+        dest="projects",
+        help="Project to ingest; may be repeated. Defaults to all projects.",
+    )
+    parser.add_argument("--window-size", type=int, default=30)
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--mirror-path", type=Path, default=None)
+    parser.add_argument("--statistics", action="store_true")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--prometheus-path", type=Path, default=None)
+    args = parser.parse_args()
+
     timer = time.time()
-    run("https://github.com/asv-runner/asv-collection.git", write=True)
+    run(
+        args.url,
+        projects=args.projects,
+        write=True,
+        window_size=args.window_size,
+        incremental=args.incremental,
+        workers=args.workers,
+        mirror_path=args.mirror_path,
+        statistics=args.statistics,
+        profile=args.profile,
+        prometheus_path=args.prometheus_path,
+    )
     print(time.time() - timer)
@@ -1,5 +1,15 @@
 from __future__ import annotations
 
+import numpy as np
+import pandas as pd
+
+# Display strings of the integer parts below 1000, without and with a minus sign.
+_WHOLE = np.array(
+    [[f"{i}" for i in range(1000)], [f"-{i}" for i in range(1000)]], dtype=object
+)
+# Groups of three digits following the first.
+_DIGITS = np.array([f"{i:03d}" for i in range(1000)], dtype=object)
+
 
 def time_to_str(x: float) -> str:
     is_negative = x < 0.0
@@ -16,3 +26,125 @@ def time_to_str(x: float) -> str:
     if is_negative:
         result = "-" + result
     return result
+
+
+def times_to_str(values: np.ndarray | pd.Series) -> np.ndarray:
+    """Vectorized ``time_to_str``.
+
+    Args:
+        values: Times in seconds.
+
+    Returns:
+        Object array with the display string of each time.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    bands = [values >= 1.0, values >= 0.001, values >= 0.000001]
+    scales = np.select(bands, [1, 1000, 1000**2], default=1000**3)
+    codes = np.select(bands, [0, 1, 2], default=3)
+    result = _fixed_to_str(values * scales, ["s", "ms", "us", "ns"], codes)
+    negative = values < 0.0
+    result[negative] = "-" + result[negative]
+    return result
+
+
+def percents_to_str(values: np.ndarray | pd.Series) -> np.ndarray:
+    """Vectorized ``f"{x:0.3%}"``.
+
+    Args:
+        values: Fractions, where 1.0 is 100%.
+
+    Returns:
+        Object array with the display string of each fraction.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    result = _fixed_to_str(values * 100, ["%"], np.zeros(len(values), dtype=int))
+    return result
+
+
+def _fixed_to_str(values: np.ndarray, units: list[str], codes: np.ndarray):
+    # Same as f"{x:.3f}{units[code]}", assembled from precomputed parts. Values
+    # are rounded to thousandths in floating point, which only differs from
+    # rounding their exact binary value near a tie; those, along with values
+    # that are not finite or too large, are formatted one at a time.
+    scaled = values * 1000
+    with np.errstate(invalid="ignore"):
+        distance = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5)
+        exact = (np.abs(scaled) < 2**52) & (distance > 2 * np.spacing(np.abs(scaled)))
+    digits = np.abs(np.rint(np.where(exact, scaled, 0))).astype(np.int64)
+    whole, fraction = np.divmod(digits, 1000)
+    sign = np.signbit(values).astype(int)
+
+    tails = np.array(
+        [[f".{i:03d}{unit}" for i in range(1000)] for unit in units], dtype=object
+    )
+    result = tails[codes, fraction]
+    # Prepend the integer part three digits at a time.
+    rows = np.arange(len(values))
+    while len(rows) > 0:
+        last = whole < 1000
+        result[rows[last]] = _WHOLE[sign[last], whole[last]] + result[rows[last]]
+        rows, whole, sign = rows[~last], whole[~last], sign[~last]
+        result[rows] = _DIGITS[whole % 1000] + result[rows]
+        whole = whole // 1000
+    for i in np.flatnonzero(~exact):
+        result[i] = f"{values[i]:.3f}{units[codes[i]]}"
+    return result
+
+
+def format_benchmarks(result: pd.DataFrame, strings: bool = True) -> pd.DataFrame:
+    """Add display strings for the timings and changes of benchmarks.
+
+    The numeric values are kept in ``{column}_value`` columns.
+
+    Args:
+        result: Benchmarks with numeric time, pct_change and abs_change.
+        strings: Whether to add the display strings. Otherwise the columns are
+            dropped, and ``display_strings`` can format the rows that are shown.
+
+    Returns:
+        The benchmarks with the columns replaced by their display strings.
+    """
+    columns = [c for c in ["pct_change", "abs_change", "time"] if c in result]
+    for c in columns:
+        result[f"{c}_value"] = result[c]
+    if strings:
+        result = display_strings(result)
+    else:
+        result = result.drop(columns=columns)
+
+    result = result.sort_index()
+
+    return result
+
+
+def display_strings(result: pd.DataFrame) -> pd.DataFrame:
+    """Format the ``{column}_value`` columns into their display columns.
+
+    Args:
+        result: Benchmarks or a summary of regressions with numeric values.
+
+    Returns:
+        The data with a display string column for each formatted value column.
+    """
+    result = result.copy(deep=False)
+    # One column at a time and in chunks, bounding the temporaries.
+    chunk_size = 2**18
+    for c, formatter in _FORMATTERS.items():
+        if f"{c}_value" in result:
+            values = result[f"{c}_value"].to_numpy()
+            chunks = range(0, max(len(values), 1), chunk_size)
+            result[c] = np.concatenate(
+                [formatter(values[i : i + chunk_size]) for i in chunks]
+            )
+    return result
+
+
+_FORMATTERS = {
+    "pct_change": percents_to_str,
+    "abs_change": times_to_str,
+    "time": times_to_str,
+    "pct_change_max": percents_to_str,
+    "abs_change_max": times_to_str,
+    "pct_change_mean": percents_to_str,
+    "abs_change_mean": times_to_str,
+}
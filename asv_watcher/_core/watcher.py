@@ -1,26 +1,167 @@
 from __future__ import annotations
 
+import functools
+import re
 import urllib.parse
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow.dataset as ds
+
+from asv_watcher._core import util
+from asv_watcher._core.cache import (
+    generation,
+    index_regressions,
+    module_of,
+    open_benchmarks,
+    read_benchmarks,
+    read_manifest,
+)
 
 BASEDIR = (Path(__file__) / ".." / ".." / "..").resolve(strict=True)
+# Published asv pages of the projects in asv-collection.
+ASV_COLLECTION_URL = "https://asv-runner.github.io/asv-collection/"
 
 
 class Watcher:
     def __init__(
         self,
+        modules: list[str] | None = None,
+        columns: list[str] | None = None,
+        path: Path | None = None,
+        lazy: bool = False,
+        strings: bool = True,
+        project: str | None = None,
     ) -> None:
-        self._data = pd.read_parquet(BASEDIR / ".cache" / "benchmarks.parquet")
-        self._regressions = self._data[self._data.is_regression]
+        """Load benchmarks from the cache.
+
+        Args:
+            modules: Only load benchmarks in these modules, the first component
+                of the benchmark name. Defaults to all modules.
+            columns: Only load these columns, in addition to is_regression and
+                git_hash. Defaults to all columns.
+            path: Cache directory. Defaults to the project's cache in the
+                repository's .cache.
+            lazy: Only load the regressions up front. The cache is memory-mapped
+                and each series is read when it is requested.
+            strings: Whether to add display strings for the timings and changes.
+                Otherwise only the ``{column}_value`` columns are loaded; use
+                ``util.display_strings`` to format the rows that are shown.
+            project: Project in asv-collection, e.g. "pandas". Defaults to the
+                project recorded in the cache's manifest.
+
+        Raises:
+            ValueError: If neither path nor project is given.
+        """
+        if path is None:
+            if project is None:
+                raise ValueError("Either path or project is required")
+            path = BASEDIR / ".cache" / project
+        manifest = read_manifest(path) or {}
+        self.project = project if project is not None else manifest.get("project")
+        self._show_commit_url = manifest.get("show_commit_url")
+        if columns is not None:
+            columns = [*columns, "is_regression", "git_hash"]
+        self._modules = modules
+        self._columns = columns
+        self._strings = strings
+        # Version of the cache that was loaded, for invalidating derived results.
+        self.generation = generation(path)
+        self._path = path
+        self._dataset: ds.Dataset | None = None
+        self._data: pd.DataFrame | None = None
+        if lazy:
+            self._dataset = open_benchmarks(path / "benchmarks")
+            self._regressions = read_benchmarks(
+                self._dataset,
+                modules,
+                columns,
+                expression=ds.field("is_regression"),
+                strings=strings,
+            )
+        else:
+            self._data = read_benchmarks(
+                path / "benchmarks", modules, columns, strings=strings
+            )
+            self._regressions = self._data[self._data.is_regression]
+        if modules is None and (path / "regressions.parquet").exists():
+            regressions = pd.read_parquet(path / "regressions.parquet")
+            summary = pd.read_parquet(path / "summary.parquet")
+            if strings:
+                regressions = util.display_strings(regressions)
+                summary = util.display_strings(summary)
+            regressions = regressions[self._regressions.columns]
+            self._commits = (regressions, summary)
 
-    def benchmarks(self):
+    def is_stale(self) -> bool:
+        """Whether the cache was written again since it was loaded."""
+        return generation(self._path) != self.generation
+
+    def benchmarks(self) -> pd.DataFrame | ds.Dataset:
+        """All benchmarks.
+
+        Returns:
+            The benchmarks. When lazy, the unread dataset over the cache instead;
+            use ``series`` to read a single benchmark.
+        """
+        if self._data is None:
+            return self._dataset
         return self._data
 
     def regressions(self):
         return self._regressions
 
+    def summary(self) -> pd.DataFrame:
+        """Summary of the regressions of each commit, newest first."""
+        return self._commits[1]
+
+    def regressions_for(self, git_hash: str) -> pd.DataFrame:
+        """Get the regressions of a commit.
+
+        Args:
+            git_hash: Hash of the commit.
+
+        Returns:
+            The regressions of the commit.
+
+        Raises:
+            ValueError: If git_hash has no regression.
+        """
+        regressions, summary = self._commits
+        try:
+            start, stop = summary.loc[git_hash, ["start", "stop"]]
+        except KeyError:
+            raise ValueError(f"No regressions found for {git_hash}") from None
+        return regressions.iloc[start:stop]
+
+    def series(self, name: str, params: str, env: str | None = None) -> pd.DataFrame:
+        """Get the time series of a single benchmark.
+
+        Args:
+            name: Name of the benchmark.
+            params: Parameter string of the benchmark.
+            env: Environment of the benchmark. Defaults to all environments.
+
+        Returns:
+            The benchmark's data indexed by revision, or by env and revision
+            when env is not given.
+        """
+        key = (name, params) if env is None else (name, params, env)
+        if self._data is not None:
+            return self._data.loc[key]
+        expression = (ds.field("name") == name) & (ds.field("params") == params)
+        if env is not None:
+            expression &= ds.field("env") == env
+        data = read_benchmarks(
+            self._dataset,
+            [module_of(name)],
+            self._columns,
+            expression=expression,
+            strings=self._strings,
+        )
+        return data.loc[key]
+
     def commit_range(self, git_hash: str) -> str:
         """Get commit range between a hash and the previous hash that has a benchmark.
 
@@ -31,22 +172,70 @@ class Watcher:
         Returns:
             The commit range in the form of "{prev_git_hash}...{git_hash}" from the
             previous commit that has a benchmark to the provided git_hash.
+
+        Raises:
+            ValueError: If git_hash has no regression, or no earlier commit has
+                a benchmark.
         """
-        # TODO: Error checking if git_hash is here and list is non-empty
         # We're interested in the hashes, so just grab a single benchmark to get
         # the time series.
-        benchmark = (
-            self._regressions[self._regressions["git_hash"].eq(git_hash)]
-            .droplevel(["revision"])
-            .index.tolist()
-        )[0]
-        time_series = self._data.loc[benchmark]
-        prev_git_hash = time_series.shift(1)[
-            time_series.git_hash == git_hash
-        ].git_hash.iloc[0]
+        *key, revision = self.regressions_for(git_hash).index[0]
+        revisions, git_hashes = self._series_hashes(*key)
+        idx = np.searchsorted(revisions, revision)
+        if idx == 0:
+            raise ValueError(f"No benchmarked commit precedes {git_hash}")
+        prev_git_hash = git_hashes[idx - 1]
         result = f"{prev_git_hash}...{git_hash}"
         return result
 
+    def commit_url(self, git_hash: str) -> str:
+        """Get the URL of a commit of the project.
+
+        Args:
+            git_hash: Hash of the commit.
+
+        Returns:
+            The URL, from ``show_commit_url`` in the project's index.json.
+
+        Raises:
+            ValueError: If the cache has no manifest recording the URL.
+        """
+        if self._show_commit_url is None:
+            raise ValueError("The cache's manifest has no show_commit_url")
+        return f"{self._show_commit_url}{git_hash}"
+
+    def _compare_url(self, git_hash: str) -> str:
+        # GitHub compares commits at .../compare/ next to .../commit/.
+        base_url = re.sub(r"commit/?$", "compare/", self.commit_url(""))
+        return base_url + self.commit_range(git_hash)
+
+    @functools.cached_property
+    def _commits(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        # Regressions ordered by commit, along with the summary of each commit
+        # holding offsets into them. Loaded from the cache when available.
+        # Watchers built without __init__, e.g. in tests, format strings.
+        strings = getattr(self, "_strings", True)
+        return index_regressions(self._regressions, strings)
+
+    @functools.cached_property
+    def _series_cache(
+        self,
+    ) -> dict[tuple[str, str, str | None], tuple[np.ndarray, np.ndarray]]:
+        return {}
+
+    def _series_hashes(
+        self, name: str, params: str, env: str | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Revisions of a series, in order, along with their git hashes.
+        key = (name, params, env)
+        if key not in self._series_cache:
+            series = self.series(name, params, env)
+            self._series_cache[key] = (
+                series.index.to_numpy(),
+                series["git_hash"].to_numpy(),
+            )
+        return self._series_cache[key]
+
     def generate_report(self, git_hash: str, pr: str, authors: str) -> str:
         """Generate a regression report.
 
@@ -57,9 +246,17 @@ class Watcher:
 
         Returns:
             A detailed regression report.
+
+        Raises:
+            ValueError: If the cache has no manifest recording the project.
         """
-        regressions = self.regressions()
-        regressions = regressions[regressions["git_hash"].eq(git_hash)]
+        if self.project is None:
+            raise ValueError("The cache's manifest has no project")
+        regressions = util.display_strings(self.regressions_for(git_hash))
+        # A benchmark is listed once, however many environments it regressed in.
+        regressions = regressions.groupby(
+            level=["name", "params"], sort=False, observed=True
+        ).head(1)
 
         result = ""
         result += (
@@ -75,7 +272,7 @@ class Watcher:
 
         for idx, regression in regressions.iterrows():
             benchmark, params = idx[0], idx[1]
-            base_url = "https://asv-runner.github.io/asv-collection/pandas/#"
+            base_url = f"{ASV_COLLECTION_URL}{self.project}/#"
             url = f"{base_url}{benchmark}"
             severity = f"{regression['pct_change']} ({regression['abs_change']})"
             result += f" - [ ] [{benchmark}]({url})"
@@ -97,8 +294,7 @@ class Watcher:
             "\n\n"
         )
 
-        base_url = "https://github.com/pandas-dev/pandas/compare/"
-        result += f"[Commit Range]({base_url + self.commit_range(git_hash)})"
+        result += f"[Commit Range]({self._compare_url(git_hash)})"
         result += "\n\n"
         result += "cc @" + ", @".join(authors.split(", ")) + "\n"
 
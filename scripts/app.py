@@ -11,12 +11,27 @@ from dash import Dash, Input, Output, State, dash_table, dcc, html
 from plotly.subplots import make_subplots
 
 from asv_watcher import Watcher
+from asv_watcher._core.downsample import downsample
+from asv_watcher._core.github import GitHubCache, cached_gh, pull_requests
+from asv_watcher._core.lru import LRUCache
+from asv_watcher._core.pager import Pager
+from asv_watcher._core.prefetch import PENDING, Prefetcher
+
+REPO = "pandas-dev/pandas"
+# Directory of the project in asv-collection.
+PROJECT = "pandas"
+REPO_PATH = Path("/home/richard/dev/pandas")
+github_cache = GitHubCache(Path(__file__).parent.parent / ".cache" / "github.sqlite")
+# Number of the most recent commits whose suspects are resolved at startup.
+N_PREFETCH = 50
+# Number of points of a series that are plotted at any zoom.
+MAX_PLOT_POINTS = 1000
+# Figures of the most recently viewed series.
+figure_cache = LRUCache(max_entries=256, max_bytes=128 * 2**20)
 
 timer = time.time()
-watcher = Watcher()
-cache_path = Path(__file__).parent / ".." / ".cache"
-benchmarks = watcher.benchmarks()
-summary = pd.read_parquet(cache_path / "summary.parquet")
+# Display strings are only formatted for the rows that are shown.
+watcher = Watcher(lazy=True, strings=False, project=PROJECT)
 summary_columns = [
     "date",
     "benchmarks",
@@ -26,6 +41,17 @@ summary_columns = [
     "abs_change_mean",
     "git_hash",
 ]
+summary_pager = Pager(watcher.summary(), summary_columns)
+commit_columns = [
+    "name",
+    "params",
+    "env",
+    "pct_change",
+    "abs_change",
+    "time",
+    "revision",
+    "agreement",
+]
 print("Startup time:", time.time() - timer)
 
 # Initialize the app
@@ -39,30 +65,24 @@ def execute(cmd):
     return response.stdout.decode()
 
 
-# Exclude any hashes that already have an issue
-needle = "Potential regression induced by commit "
-cmd = f'gh search issues "{needle}"'
-result = execute(cmd)
-flagged_hashes = list()
-for e in result.split("\t"):
-    if e.startswith(needle):
-        flagged_hashes.append(e[len(needle) :])
-
-
 # TODO: Because calling the GH CLI from Juptyer seems to always have color...
 def escape_ansi(line):
     ansi_escape = re.compile(r"(?:\x1B[@-_]|[\x80-\x9F])[0-?]*[ -/]*[@-~]")
     return ansi_escape.sub("", line)
 
 
-response = execute(
-    "cd /home/richard/dev/pandas/ && NO_COLOR=1 gh label list --limit 200 --json name"
+response = cached_gh(
+    github_cache, "label", "list", "--limit", "200", "--json", "name", cwd=REPO_PATH
 )
 labels = [e["name"] for e in json.loads(escape_ansi(response))]
 
-response = execute(
-    "cd /home/richard/dev/pandas/ "
-    "&& gh api repos/:owner/:repo/milestones --jq '.[].title'"
+response = cached_gh(
+    github_cache,
+    "api",
+    "repos/:owner/:repo/milestones",
+    "--jq",
+    ".[].title",
+    cwd=REPO_PATH,
 )
 milestones = [e for e in response.split("\n") if e != ""]
 
@@ -72,21 +92,29 @@ app.layout = html.Div(
         html.Div(children="Regression Navigator"),
         dash_table.DataTable(
             id="summary",
-            data=summary[summary_columns].to_dict("records"),
+            columns=[{"id": c, "name": c} for c in summary_columns],
             page_current=0,
             page_size=10,
+            page_action="custom",
             sort_action="custom",
             sort_mode="single",
+            filter_action="custom",
+            filter_query="",
         ),
         dash_table.DataTable(
             id="commit_table",
+            columns=[{"id": c, "name": c} for c in commit_columns],
             data=pd.DataFrame().to_dict("records"),
             page_current=0,
             page_size=10,
+            page_action="custom",
             sort_action="custom",
             sort_mode="single",
+            filter_action="custom",
+            filter_query="",
         ),
         dcc.Graph(id="benchmark_plot", figure={}),
+        dcc.Interval(id="pr_poll", interval=500, disabled=True),
         html.Div(
             [
                 html.P(
@@ -250,28 +278,35 @@ app.layout = html.Div(
     ]
 )
 
-regressions = []
-
-
-@app.callback(Output("summary", "data"), Input("summary", "sort_by"))
-def update_table(sort_by):
-    if sort_by is not None:
-        name = sort_by[0]["column_id"]
-        if name in [
-            "pct_change_max",
-            "abs_change_max",
-            "pct_change_mean",
-            "abs_change_mean",
-        ]:
-            name += "_value"
-        result = summary.sort_values(
-            name,
-            ascending=sort_by[0]["direction"] == "asc",
-        )
-    else:
-        result = summary
-    result = result[summary_columns]
-    return result.to_dict("records")
+# Pager of the commit selected in the summary.
+commit_pager = (None, Pager(pd.DataFrame(columns=commit_columns), commit_columns))
+
+
+def reload_watcher():
+    # Pick up the cache written by the latest ingest run, dropping everything
+    # derived from the previous one.
+    global watcher, summary_pager, commit_pager
+    if not watcher.is_stale():
+        return
+    watcher = Watcher(lazy=True, strings=False, project=PROJECT)
+    summary_pager = Pager(watcher.summary(), summary_columns)
+    commit_pager = (None, commit_pager[1])
+    # Commit ranges may have changed along with the benchmarked revisions.
+    suspects.clear()
+    suspects.prefetch(watcher.summary()["git_hash"].iloc[:N_PREFETCH])
+
+
+@app.callback(
+    Output("summary", "data"),
+    Output("summary", "page_count"),
+    Input("summary", "page_current"),
+    Input("summary", "page_size"),
+    Input("summary", "sort_by"),
+    Input("summary", "filter_query"),
+)
+def update_table(page_current, page_size, sort_by, filter_query):
+    reload_watcher()
+    return summary_pager.page(page_current, page_size, sort_by, filter_query)
 
 
 @app.callback(
@@ -282,46 +317,55 @@ def update_copy_github_comment(issue_body):
     return issue_body
 
 
+def resolve_suspects(git_hash):
+    commit_range = watcher.commit_range(git_hash)
+    response = execute(f"cd {REPO_PATH} && git rev-list --ancestry-path {commit_range}")
+    commits = [e for e in response.split("\n") if e != ""]
+
+    data = []
+    repo_url = f"https://github.com/{REPO}"
+    for commit, prs in pull_requests(commits, REPO, github_cache).items():
+        if len(prs) != 1:
+            raise ValueError(
+                f"Expected one pull request for commit {commit}, found {len(prs)}"
+            )
+        data.append(
+            {
+                "Authors": ", ".join(prs[0]["authors"]),
+                "PR": f"[{prs[0]['title']}]({repo_url}/pull/{prs[0]['number']})",
+            }
+        )
+    return data
+
+
+# Resolved in the background, most recent commits first. Failures of git or
+# gh, and unexpected responses, are shown in the table.
+SUSPECT_ERRORS = (OSError, KeyError, ValueError)
+suspects = Prefetcher(resolve_suspects, errors=SUSPECT_ERRORS)
+suspects.prefetch(watcher.summary()["git_hash"].iloc[:N_PREFETCH])
+
+
 @app.callback(
     Output("pr_table", "data"),
+    Output("pr_poll", "disabled"),
     Input("summary", "active_cell"),
     Input("summary", "derived_viewport_data"),
+    Input("pr_poll", "n_intervals"),
 )
-def update_pr_table(active_cell, derived_viewport_data):
-    if active_cell:
+def update_pr_table(active_cell, derived_viewport_data, n_intervals):
+    if active_cell and active_cell["row"] < len(derived_viewport_data):
         git_hash = derived_viewport_data[active_cell["row"]]["git_hash"]
-        commit_range = watcher.commit_range(git_hash)
-        response = execute(
-            f"cd /home/richard/dev/pandas"
-            f" && git rev-list --ancestry-path {commit_range}"
-        )
-        commits = [e for e in response.split("\n") if e != ""]
-
-        data = []
-        for commit in commits:
-            response = execute(
-                f"cd /home/richard/dev/pandas"
-                f" && gh pr list"
-                f'    --search "{commit[:7]}"'
-                f"    --state merged"
-                f"    --json title,number,author"
-            )
-            titles = [e["title"] for e in json.loads(escape_ansi(response))]
-            numbers = [e["number"] for e in json.loads(escape_ansi(response))]
-            authors = [e["author"] for e in json.loads(escape_ansi(response))]
-            authors = [e for e in authors if not e["is_bot"]]
-            authors = [e["login"] for e in authors]
-            assert len(titles) == 1, titles
-            assert len(numbers) == 1, numbers
-            repo_url = "https://github.com/pandas-dev/pandas"
-            data.append(
-                {
-                    "Authors": ", ".join(authors),
-                    "PR": f"[{titles[0]}]({repo_url}/pull/{numbers[0]})",
-                }
-            )
-        return pd.DataFrame(data).to_dict("records")
-    return pd.DataFrame().to_dict("records")
+        try:
+            data = suspects.get(git_hash)
+        except SUSPECT_ERRORS as err:
+            # Stop polling; selecting the commit again retries once the error
+            # expires.
+            return [{"Authors": "", "PR": f"Error: {err}"}], True
+        if data is PENDING:
+            # Poll until the suspects are resolved.
+            return [{"Authors": "", "PR": "Pending..."}], False
+        return data, True
+    return pd.DataFrame().to_dict("records"), True
 
 
 @app.callback(
@@ -339,6 +383,9 @@ def update_issue_values(pr_cell, pr_table, summary_cell, summary_table):
         git_hash = summary_table[summary_cell["row"]]["git_hash"]
 
         pr_link = pr_table[pr_cell["row"]]["PR"]
+        if "/pull/" not in pr_link:
+            # The pending or error row.
+            return "", "", ["Performance", "Regression"]
         idx = pr_link.rfind("/pull/")
         pr_number = pr_link[idx + len("/pull/") : -1]
 
@@ -409,40 +456,54 @@ def display_confirm(n_clicks, gh_cli_cmd):
 
 @app.callback(
     Output("commit_table", "data"),
+    Output("commit_table", "page_count"),
     Input("summary", "active_cell"),
     Input("summary", "derived_viewport_data"),
+    Input("commit_table", "page_current"),
+    Input("commit_table", "page_size"),
     Input("commit_table", "sort_by"),
+    Input("commit_table", "filter_query"),
 )
-def update_commit_table(active_cell, derived_viewport_data, sort_by):
-    global regressions
+def update_commit_table(
+    active_cell, derived_viewport_data, page_current, page_size, sort_by, filter_query
+):
+    global commit_pager
 
-    if active_cell is None:
-        return None
+    if active_cell is None or active_cell["row"] >= len(derived_viewport_data):
+        return [], 1
 
+    reload_watcher()
     git_hash = derived_viewport_data[active_cell["row"]]["git_hash"]
-    regressions = watcher.regressions()
-    result = regressions[regressions["git_hash"].eq(git_hash)].reset_index()
-
-    if sort_by is not None:
-        name = sort_by[0]["column_id"]
-        if name in ["pct_change", "abs_change"]:
-            name += "_value"
-        result = result.sort_values(
-            name,
-            ascending=sort_by[0]["direction"] == "asc",
-        )
-
-    return result[
-        ["name", "params", "pct_change", "abs_change", "time", "revision"]
-    ].to_dict("records")
+    if commit_pager[0] != git_hash:
+        regressions = watcher.regressions_for(git_hash).reset_index()
+        commit_pager = (git_hash, Pager(regressions, commit_columns))
+    return commit_pager[1].page(page_current, page_size, sort_by, filter_query)
+
+
+def zoom_range(relayout_data):
+    # Range of the x-axis after a relayout event, None when zoomed out, or
+    # no_update when the x-axis did not change.
+    if "xaxis.range[0]" in relayout_data:
+        return relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    if "xaxis.range" in relayout_data:
+        return tuple(relayout_data["xaxis.range"])
+    if "xaxis.autorange" in relayout_data:
+        return None
+    return dash.no_update
 
 
 @app.callback(
     Output("benchmark_plot", "figure"),
     Input("commit_table", "active_cell"),
     Input("commit_table", "derived_viewport_data"),
+    Input("benchmark_plot", "relayoutData"),
 )
-def update_plot(active_cell, derived_viewport_data):
+def update_plot(active_cell, derived_viewport_data, relayout_data):
+    x_range = None
+    if dash.ctx.triggered_id == "benchmark_plot":
+        x_range = zoom_range(relayout_data or {})
+        if x_range is dash.no_update:
+            return dash.no_update
     if active_cell is None:
         return dash.no_update
     if active_cell["row"] >= len(derived_viewport_data):
@@ -452,6 +513,21 @@ def update_plot(active_cell, derived_viewport_data):
 
     name = derived_viewport_data[active_cell["row"]]["name"]
     params = derived_viewport_data[active_cell["row"]]["params"]
+    env = derived_viewport_data[active_cell["row"]]["env"]
+    # Figures depend on the detection results, which change with the cache.
+    reload_watcher()
+    figure_cache.invalidate(watcher.generation)
+    key = (name, params, env, x_range)
+    figure = figure_cache.get(key)
+    if figure is None:
+        # Serialized once, both to return and to size the entry in the cache.
+        figure_json = plot_series(name, params, env, x_range).to_json()
+        figure = json.loads(figure_json)
+        figure_cache.put(key, figure, len(figure_json))
+    return figure
+
+
+def plot_series(name, params, env, x_range):
     columns = [
         "revision",
         "date",
@@ -461,11 +537,20 @@ def update_plot(active_cell, derived_viewport_data):
         "is_regression",
     ]
     plot_data = (
-        benchmarks.loc[(name, params)]
-        .drop(columns="time")
+        watcher.series(name, params, env)
         .rename(columns={"time_value": "time"})
         .reset_index()[columns]
     )
+    # Only plot the points that can be told apart at the current zoom; all of
+    # them once zoomed in far enough. Regressions are always plotted.
+    rows = downsample(
+        plot_data.index.to_numpy(),
+        plot_data["time"].to_numpy(),
+        MAX_PLOT_POINTS,
+        keep=plot_data["is_regression"].to_numpy(),
+        x_range=x_range,
+    )
+    plot_data = plot_data.iloc[rows]
 
     fig = make_subplots(specs=[[{"secondary_y": True}]])
     for column in plot_data:
@@ -495,8 +580,15 @@ def update_plot(active_cell, derived_viewport_data):
         marker={"size": 12, "line": {"width": 2, "color": "DarkSlateGrey"}},
         selector={"mode": "markers"},
     )
+    # Keep the zoom of the series across updates.
+    fig.update_layout(uirevision=f"{name} {params} {env}")
     return fig
 
 
+@app.server.route("/stats")
+def stats():
+    return {"figure_cache": figure_cache.stats()}
+
+
 if __name__ == "__main__":
     app.run(debug=True)
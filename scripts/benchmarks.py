@@ -0,0 +1,427 @@
+"""Time asv-watcher internals against synthetic data.
+
+Usage: python scripts/benchmarks.py [name ...]
+"""
+
+import argparse
+import datetime
+import functools
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from asv_watcher import PeltDetector, RollingDetector, Watcher
+from asv_watcher._core import util
+from asv_watcher._core.cache import read_cache, write_cache
+from asv_watcher._core.downsample import downsample
+from asv_watcher._core.pager import Pager
+from asv_watcher._core.parameters import ParameterCollection
+from asv_watcher._core.reader import BACKENDS, concat_graphs, read_graph
+from asv_watcher._core.synthetic import generate_collection
+from asv_watcher._core.update_data import (
+    detect_regressions,
+    determine_benchmark_prefixes,
+    extract_benchmark_data,
+    file_state,
+    graph_prefix,
+    load_benchmarks,
+    make_param_string,
+    process_benchmarks,
+    read_index_data,
+)
+
+
+def timeit(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        timer = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - timer)
+    return best
+
+
+def extract_benchmark_data_rows(
+    json_data, parameter_collection, revision_to_date, index_data
+):
+    # Row-based implementation prior to vectorization, kept as a baseline.
+    revisions, times = list(zip(*json_data))
+
+    data = []
+    for revision, revision_times in zip(revisions, times):
+        if revision_times is None:
+            continue
+        elif isinstance(revision_times, float):
+            revision_times = [revision_times]
+        for i, seconds in zip(range(len(parameter_collection)), revision_times):
+            data_inner = parameter_collection[i].to_dict()
+            data_inner["revision"] = str(revision)
+            date = revision_to_date.get(str(revision), pd.NaT)
+            if not pd.isna(date):
+                date = datetime.datetime.fromtimestamp(date / 1000.0, tz=pytz.utc)
+            data_inner["date"] = date
+            data_inner["time"] = seconds
+            data.append(data_inner)
+    if len(data) == 0:
+        return pd.DataFrame()
+    df = pd.DataFrame(data)
+    df["commit_hash"] = df["revision"].map(index_data["revision_to_hash"])
+    return df
+
+
+def bench_extract(n_revisions=2000, sizes=(4, 5, 3)):
+    rng = np.random.default_rng(0)
+    names = [f"p{k}" for k in range(len(sizes))]
+    values = [[f"'{k}-{i}'" for i in range(size)] for k, size in enumerate(sizes)]
+    parameter_collection = ParameterCollection(names, values)
+    n_combos = int(np.prod(sizes))
+    json_data = [
+        [revision, rng.random(n_combos).tolist()] for revision in range(n_revisions)
+    ]
+    revision_to_date = {
+        str(revision): 1674873876000 + 60_000 * revision
+        for revision in range(n_revisions)
+    }
+    revision_to_hash = {
+        str(revision): f"{revision:040x}" for revision in range(n_revisions)
+    }
+    index_data = {"revision_to_hash": revision_to_hash}
+    args = (json_data, parameter_collection, revision_to_date, index_data)
+
+    result = extract_benchmark_data(*args)
+    expected = extract_benchmark_data_rows(*args)
+    combos = expected[names].to_numpy().tolist()
+    expected.insert(0, "params", [make_param_string(names, e) for e in combos])
+    expected = expected.drop(columns=names)
+    expected["revision"] = expected["revision"].astype(int)
+    pd.testing.assert_frame_equal(result, expected)
+
+    rows = timeit(lambda: extract_benchmark_data_rows(*args))
+    columns = timeit(lambda: extract_benchmark_data(*args))
+    print(f"extract ({len(result)} rows): rows {rows:.4f}s, columnar {columns:.4f}s")
+
+
+def determine_benchmark_prefixes_glob(benchmark_path):
+    # Discovery by walking the whole graphs directory, kept as a baseline.
+    paths = set()
+    for path in (benchmark_path / "graphs").glob("**/*.json"):
+        if "summary" in str(path):
+            continue
+        paths.add(path.parent)
+    return paths
+
+
+def bench_discovery(n_machines=20, n_benchmarks=2000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        benchmark_path = Path(tmpdir)
+        graph_param_list = [
+            {"machine": f"machine-{k}", "python": "3.10", "branch": "main"}
+            for k in range(n_machines)
+        ]
+        index_data = {"graph_param_list": graph_param_list}
+        for params in [*graph_param_list, {"summary": ""}]:
+            prefix = benchmark_path / "graphs" / graph_prefix(params)
+            os.makedirs(prefix)
+            for i in range(n_benchmarks):
+                (prefix / f"benchmarks.Suite.time_{i}.json").touch()
+
+        result = determine_benchmark_prefixes(benchmark_path, index_data)
+        expected = determine_benchmark_prefixes_glob(benchmark_path)
+        assert set(result) == expected
+
+        walk = timeit(lambda: determine_benchmark_prefixes_glob(benchmark_path))
+        index = timeit(lambda: determine_benchmark_prefixes(benchmark_path, index_data))
+        n_files = (n_machines + 1) * n_benchmarks
+        print(f"discovery ({n_files} files): glob {walk:.4f}s, index {index:.4f}s")
+
+
+def synthetic_timings(n_series, n_revisions):
+    # One step regression halfway through each series.
+    rng = np.random.default_rng(0)
+    names = [f"module_{i % 20}.Suite.time_{i}" for i in range(n_series)]
+    index = pd.MultiIndex.from_product(
+        [names, [""], pd.Categorical(["machine=bench"]), range(n_revisions)],
+        names=["name", "params", "env", "revision"],
+    )
+    steps = rng.random((n_series, 1)) * (np.arange(n_revisions) > n_revisions // 2)
+    times = 1 + steps + 0.01 * rng.random((n_series, n_revisions))
+    revisions = np.tile(np.arange(n_revisions), n_series)
+    dates = pd.Timestamp("2020-01-01", tz="UTC") + pd.to_timedelta(revisions, "h")
+    result = pd.DataFrame(
+        {
+            "time": times.ravel(),
+            "git_hash": [f"{revision:040x}" for revision in revisions],
+            "date": dates.as_unit("us"),
+        },
+        index=index,
+    )
+    return result
+
+
+def bench_detect(n_series=1000, n_revisions=1000, window_size=30):
+    data = synthetic_timings(n_series, n_revisions)[["time"]]
+
+    expected = RollingDetector(window_size=window_size).detect_regression(data)
+    engines = ["pandas", "numpy"]
+    try:
+        import numba  # noqa: F401
+
+        engines.append("numba")
+    except ImportError:
+        pass
+    timings = []
+    for engine in engines:
+        detector = RollingDetector(window_size=window_size, engine=engine)
+        result = detector.detect_regression(data)
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+        timing = timeit(functools.partial(detector.detect_regression, data), repeat=3)
+        timings.append(f"{engine} {timing:.4f}s")
+    print(f"detect ({len(data)} rows): {', '.join(timings)}")
+
+
+def bench_changepoint(n_series=1000, n_revisions=1000, window_size=30):
+    detectors = {
+        "rolling": RollingDetector(window_size=window_size, engine="numpy"),
+        "pelt": PeltDetector(),
+    }
+    benchmark_path = Path(__file__).parent / ".." / "tests" / "data"
+    fixture = process_benchmarks(benchmark_path, window_size=5)
+    fixture = fixture[["time_value", "git_hash", "date"]].rename(
+        columns={"time_value": "time"}
+    )
+    fixture_detectors = {**detectors, "rolling": RollingDetector(window_size=5)}
+    for name, detector in fixture_detectors.items():
+        result = detector.detect_regression(fixture)
+        found = result.index[result.is_regression].droplevel("env").tolist()
+        print(f"changepoint fixture, {name}: {found}")
+
+    # Every series has a step after n_revisions // 2; those of at least 5% are
+    # regressions.
+    data = synthetic_timings(n_series, n_revisions)[["time"]]
+    step = n_revisions // 2 + 1
+    times = data["time"].to_numpy().reshape(n_series, n_revisions)
+    actual = times[:, step] / times[:, step - 1] > 1.1
+    for name, detector in detectors.items():
+        detector.detect_regression(data)
+        timing = timeit(functools.partial(detector.detect_regression, data), repeat=3)
+        result = detector.detect_regression(data).sort_index()
+        flagged = result["is_regression"].to_numpy().reshape(n_series, n_revisions)
+        recall = flagged[actual, step].mean()
+        false_positives = flagged.sum() - flagged[:, step].sum()
+
+        # Number of timings after a step needed to detect it.
+        subset = data.loc[data.index.unique("name")[:20]]
+        revisions = subset.index.get_level_values("revision")
+        delay = next(
+            (
+                delay
+                for delay in range(1, 2 * window_size)
+                if detector.detect_regression(
+                    subset[revisions < step + delay]
+                ).is_regression.any()
+            ),
+            None,
+        )
+        print(
+            f"changepoint ({len(data)} rows), {name}: {timing:.4f}s, recall"
+            f" {recall:.3f}, {false_positives} false positives, delay {delay}"
+        )
+
+
+def bench_format(n_rows=1_000_000):
+    rng = np.random.default_rng(0)
+    times = 10 ** rng.uniform(-9, 2, n_rows)
+    changes = rng.normal(size=n_rows) * 1e-3
+    pct_changes = rng.normal(size=n_rows)
+
+    def format_apply():
+        pd.Series(times).apply(util.time_to_str)
+        pd.Series(changes).apply(util.time_to_str)
+        pd.Series(pct_changes).apply(lambda x: f"{x:0.3%}")
+
+    def format_vectorized():
+        util.times_to_str(times)
+        util.times_to_str(changes)
+        util.percents_to_str(pct_changes)
+
+    apply = timeit(format_apply, repeat=1)
+    vectorized = timeit(format_vectorized, repeat=3)
+    print(f"format ({n_rows} rows): apply {apply:.4f}s, vectorized {vectorized:.4f}s")
+
+
+def bench_pager(n_rows=20_000, page_size=10):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        {
+            "git_hash": [f"{i:040x}" for i in range(n_rows)],
+            "pct_change_max_value": rng.normal(size=n_rows),
+            "abs_change_max_value": rng.normal(size=n_rows) * 1e-3,
+        }
+    )
+    columns = ["git_hash", "pct_change_max", "abs_change_max"]
+    sort_by = [{"column_id": "pct_change_max", "direction": "desc"}]
+    formatted = util.display_strings(data)
+
+    def page_full():
+        result = formatted.sort_values("pct_change_max_value", ascending=False)
+        result[columns].to_dict("records")
+
+    pager = Pager(data, columns)
+    pager.page(0, page_size, sort_by)
+    full = timeit(page_full)
+    paged = timeit(lambda: pager.page(3, page_size, sort_by))
+    print(f"pager ({n_rows} rows): full {full:.4f}s, paged {paged:.4f}s")
+
+
+def bench_downsample(n_points=100_000, n_out=1000):
+    rng = np.random.default_rng(0)
+    x = np.arange(n_points)
+    y = rng.random(n_points)
+    keep = rng.random(n_points) < 0.001
+
+    timing = timeit(lambda: downsample(x, y, n_out, keep=keep))
+    n_selected = len(downsample(x, y, n_out, keep=keep))
+    print(f"downsample ({n_points} points to {n_selected}): {timing:.4f}s")
+
+
+def bench_watcher(n_series=2000, n_revisions=1000):
+    code = (
+        "import pathlib, re, sys, time;"
+        "timer = time.perf_counter();"
+        "from asv_watcher import Watcher;"
+        "path = pathlib.Path(sys.argv[1]);"
+        "watcher = Watcher(path=path, lazy=sys.argv[2] == 'lazy');"
+        "watcher.series('module_0.Suite.time_0', '');"
+        "status = open('/proc/self/status').read();"
+        "rss = int(re.search(r'VmHWM:\\s+(\\d+)', status).group(1));"
+        "print(time.perf_counter() - timer, rss / 1024)"
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data = synthetic_timings(n_series, n_revisions)
+        benchmarks = util.format_benchmarks(
+            RollingDetector(window_size=30, engine="numpy").detect_regression(data)
+        )
+        write_cache(Path(tmpdir), benchmarks)
+
+        results = []
+        for mode in ["eager", "lazy"]:
+            response = subprocess.run(
+                [sys.executable, "-c", code, tmpdir, mode],
+                capture_output=True,
+                check=True,
+                text=True,
+            )
+            startup, rss = map(float, response.stdout.split())
+            results.append(f"{mode} {startup:.2f}s / {rss:.0f}MB peak RSS")
+    print(f"watcher ({len(benchmarks)} rows): {', '.join(results)}")
+
+
+def bench_scale(scales=(1, 10, 100), window_size=30):
+    # Multiples of 50 benchmarks of 6 parameter combinations over 500 revisions
+    # on 2 machines; 100x is on the order of pandas' collection.
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            benchmark_path = Path(tmpdir) / "project"
+            cache_path = Path(tmpdir) / "cache"
+            expected = generate_collection(
+                benchmark_path, n_benchmarks=50 * scale, n_machines=2
+            )
+            index_data = read_index_data(benchmark_path)
+            files = {
+                str(path.relative_to(benchmark_path)): {
+                    **file_state(path),
+                    "revision": -1,
+                }
+                for path in (benchmark_path / "graphs").glob("**/*.json")
+            }
+
+            timings = {}
+            timer = time.perf_counter()
+            data = load_benchmarks(benchmark_path, index_data, files)
+            timings["ingest"] = time.perf_counter() - timer
+            timer = time.perf_counter()
+            result = detect_regressions(data, window_size)
+            timings["detect"] = time.perf_counter() - timer
+            benchmarks = util.format_benchmarks(result)
+            timer = time.perf_counter()
+            write_cache(cache_path, benchmarks, {"window_size": window_size})
+            timings["write"] = time.perf_counter() - timer
+            timings["read"] = timeit(
+                functools.partial(read_cache, cache_path), repeat=1
+            )
+
+            name, params, _ = expected.index[0]
+            git_hash = benchmarks[benchmarks.is_regression]["git_hash"].iloc[0]
+            for mode in ["eager", "lazy"]:
+                watcher = Watcher(path=cache_path, lazy=mode == "lazy")
+                timings[f"{mode} series"] = timeit(
+                    functools.partial(watcher.series, name, params), repeat=3
+                )
+                timings[f"{mode} commit"] = timeit(
+                    functools.partial(watcher.regressions_for, git_hash), repeat=3
+                )
+
+            found = result[result.is_regression].reset_index(["env", "revision"])
+            recall = expected.index.droplevel("revision").isin(found.index).mean()
+            timings = ", ".join(f"{key} {value:.4f}s" for key, value in timings.items())
+            print(f"scale {scale}x ({len(data)} rows): {timings}, recall {recall:.3f}")
+
+
+def bench_reader(n_benchmarks=200, n_revisions=2000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        benchmark_path = Path(tmpdir)
+        generate_collection(
+            benchmark_path, n_benchmarks=n_benchmarks, n_revisions=n_revisions
+        )
+        paths = sorted((benchmark_path / "graphs").glob("**/*.json"))
+        n_bytes = sum(path.stat().st_size for path in paths)
+
+        def read_lists():
+            # json.load into nested lists, concatenated per benchmark, kept as a
+            # baseline.
+            buffer = []
+            for path in paths:
+                with open(path) as f:
+                    buffer.append(json.load(f))
+            return list(itertools.chain.from_iterable(buffer))
+
+        def read_arrays(backend):
+            return concat_graphs(
+                [read_graph(path, 6, backend=backend) for path in paths]
+            )
+
+        timings = [f"lists {timeit(read_lists, repeat=3):.4f}s"]
+        for backend in BACKENDS:
+            timing = timeit(functools.partial(read_arrays, backend), repeat=3)
+            timings.append(f"{backend} {timing:.4f}s")
+    print(f"reader ({n_bytes / 2**20:.0f}MB): {', '.join(timings)}")
+
+
+BENCHMARKS = {
+    "extract": bench_extract,
+    "discovery": bench_discovery,
+    "detect": bench_detect,
+    "changepoint": bench_changepoint,
+    "format": bench_format,
+    "pager": bench_pager,
+    "downsample": bench_downsample,
+    "watcher": bench_watcher,
+    "scale": bench_scale,
+    "reader": bench_reader,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("names", nargs="*", help=", ".join(BENCHMARKS))
+    args = parser.parse_args()
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -0,0 +1,193 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pytest
+
+from asv_watcher import Watcher
+from asv_watcher._core import cache, util
+from asv_watcher._core.cache import (
+    open_benchmarks,
+    read_benchmarks,
+    read_cache,
+    write_benchmarks,
+    write_cache,
+)
+from asv_watcher._core.update_data import update_benchmarks
+
+
+def test_roundtrip(tmp_path):
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks, manifest = update_benchmarks(benchmark_path, window_size=5)
+    write_cache(tmp_path, benchmarks, manifest)
+    assert os.listdir(tmp_path / "benchmarks") == ["module=benchmarks"]
+
+    result, result_manifest = read_cache(tmp_path)
+    pd.testing.assert_frame_equal(result, benchmarks)
+    assert result_manifest == manifest
+
+
+def test_row_groups(tmp_path):
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks, _ = update_benchmarks(benchmark_path, window_size=5)
+    write_benchmarks(tmp_path / "benchmarks", benchmarks, row_group_size=20)
+
+    dataset = open_benchmarks(tmp_path / "benchmarks")
+    (fragment,) = dataset.get_fragments()
+    n_row_groups = fragment.metadata.num_row_groups
+    assert n_row_groups == -(-len(benchmarks) // 20)
+    name = "benchmarks.Benchmark.time_fixed_regression"
+    expression = ds.field("name") == name
+    # Statistics of the row groups rule out those of other benchmarks.
+    scanned = fragment.split_by_row_group(expression)
+    assert 0 < len(scanned) < n_row_groups / 2
+    result = read_benchmarks(dataset, expression=expression)
+    pd.testing.assert_frame_equal(result, benchmarks.loc[[name]])
+
+
+def test_write_cache_atomic(tmp_path, monkeypatch):
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks, manifest = update_benchmarks(benchmark_path, window_size=5)
+    write_cache(tmp_path, benchmarks, manifest)
+    write_cache(tmp_path, benchmarks, manifest)
+    assert sorted(os.listdir(tmp_path)) == [
+        "benchmarks",
+        "manifest.json",
+        "regressions.parquet",
+        "summary.parquet",
+    ]
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    # A failed write leaves the previous cache in place.
+    monkeypatch.setattr(cache.pq, "write_table", fail)
+    with pytest.raises(OSError, match="disk full"):
+        write_cache(tmp_path, benchmarks.iloc[:10], {**manifest, "window_size": 2})
+    result, result_manifest = read_cache(tmp_path)
+    pd.testing.assert_frame_equal(result, benchmarks)
+    assert result_manifest == manifest
+
+
+def test_watcher_partial_load(tmp_path):
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks, _ = update_benchmarks(benchmark_path, window_size=5)
+    benchmarks = pd.concat(
+        [benchmarks, benchmarks.rename(lambda x: f"other.{x}", level="name")]
+    )
+    write_cache(tmp_path, benchmarks)
+
+    watcher = Watcher(modules=["other"], columns=["time"], path=tmp_path)
+    result = watcher.benchmarks()
+    assert result.index.get_level_values("name").str.startswith("other.").all()
+    assert list(result.columns) == ["time", "is_regression", "git_hash", "time_value"]
+    expected = benchmarks.loc[result.index, "time"]
+    pd.testing.assert_series_equal(result["time"], expected)
+
+
+def test_lazy_watcher(tmp_path):
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks, _ = update_benchmarks(benchmark_path, window_size=5)
+    write_cache(tmp_path, benchmarks)
+
+    eager = Watcher(path=tmp_path)
+    lazy = Watcher(path=tmp_path, lazy=True)
+    pd.testing.assert_frame_equal(lazy.regressions(), eager.regressions())
+    for name, params, env, _ in eager.regressions().index:
+        pd.testing.assert_frame_equal(
+            lazy.series(name, params), eager.series(name, params)
+        )
+        pd.testing.assert_frame_equal(
+            lazy.series(name, params, env), eager.series(name, params, env)
+        )
+    for git_hash in eager.regressions()["git_hash"]:
+        assert lazy.commit_range(git_hash) == eager.commit_range(git_hash)
+
+
+def test_regressions_for(tmp_path):
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks, _ = update_benchmarks(benchmark_path, window_size=5)
+    write_cache(tmp_path, benchmarks)
+
+    watcher = Watcher(path=tmp_path)
+    # Computed from the loaded regressions rather than read from the cache.
+    partial = Watcher(path=tmp_path, modules=["benchmarks"])
+    regressions = watcher.regressions()
+    summary = watcher.summary()
+    assert summary["stop"].max() == len(regressions)
+    pd.testing.assert_frame_equal(partial.summary(), summary)
+    for git_hash in summary["git_hash"]:
+        expected = regressions[regressions["git_hash"] == git_hash]
+        pd.testing.assert_frame_equal(watcher.regressions_for(git_hash), expected)
+        pd.testing.assert_frame_equal(partial.regressions_for(git_hash), expected)
+
+
+def test_summary_counts_benchmarks(tmp_path):
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks, _ = update_benchmarks(benchmark_path, window_size=5)
+    # The same regressions flagged in a second environment.
+    other = benchmarks.rename(lambda x: "machine=runner-2", level="env")
+    benchmarks = pd.concat([benchmarks, other])
+    write_cache(tmp_path, benchmarks)
+
+    partial = Watcher(path=tmp_path, modules=["benchmarks"])
+    watcher = Watcher(path=tmp_path)
+    regressions = watcher.regressions()
+    summary = watcher.summary()
+    expected = (
+        regressions.reset_index()
+        .groupby("git_hash")[["name", "params"]]
+        .value_counts()
+        .groupby("git_hash")
+        .size()
+    )
+    pd.testing.assert_series_equal(
+        summary["benchmarks"].sort_index(), expected, check_names=False
+    )
+    assert summary["stop"].max() == len(regressions) == 2 * summary["benchmarks"].sum()
+    pd.testing.assert_frame_equal(partial.summary(), summary)
+    for git_hash in summary["git_hash"]:
+        assert (
+            len(watcher.regressions_for(git_hash))
+            == 2 * summary.loc[git_hash, "benchmarks"]
+        )
+
+
+def test_watcher_without_strings(tmp_path):
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks, _ = update_benchmarks(benchmark_path, window_size=5)
+    write_cache(tmp_path, benchmarks)
+
+    watcher = Watcher(path=tmp_path)
+    for lazy in [False, True]:
+        result = Watcher(path=tmp_path, lazy=lazy, strings=False)
+        assert "time" not in result.regressions()
+        assert "pct_change_max" not in result.summary()
+        git_hash = result.summary()["git_hash"].iloc[0]
+        regressions = util.display_strings(result.regressions_for(git_hash))
+        expected = watcher.regressions_for(git_hash)
+        pd.testing.assert_frame_equal(regressions[expected.columns], expected)
+
+
+def test_generation(tmp_path):
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks, _ = update_benchmarks(benchmark_path, window_size=5)
+    write_cache(tmp_path, benchmarks)
+    first = Watcher(path=tmp_path).generation
+    assert first == Watcher(path=tmp_path, lazy=True).generation
+
+    watcher = Watcher(path=tmp_path, lazy=True)
+    assert not watcher.is_stale()
+
+    # Files next to the cache, such as the mirror of asv-collection, are ignored.
+    os.makedirs(tmp_path / "asv_collection")
+    (tmp_path / "github.sqlite").write_text("")
+    later = first + 10**9
+    os.utime(tmp_path / "github.sqlite", ns=(later, later))
+    assert Watcher(path=tmp_path).generation == first
+    assert not watcher.is_stale()
+
+    write_cache(tmp_path, benchmarks)
+    assert watcher.is_stale()
+    assert Watcher(path=tmp_path).generation > first
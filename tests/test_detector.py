@@ -0,0 +1,155 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from asv_watcher import PeltDetector, RollingDetector, StreamingDetector
+from asv_watcher._core.update_data import process_benchmarks
+
+
+@pytest.fixture
+def data():
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    benchmarks = process_benchmarks(benchmark_path, window_size=5)
+    # The test data has a single environment.
+    result = (
+        benchmarks[["time_value", "git_hash", "date"]]
+        .rename(columns={"time_value": "time"})
+        .droplevel("env")
+    )
+    return result
+
+
+@pytest.mark.parametrize("window_size", [1, 2, 5, 6])
+def test_streaming_detector(data, window_size):
+    result = StreamingDetector(window_size=window_size).detect_regression(data)
+    expected = RollingDetector(window_size=window_size).detect_regression(data)
+    pd.testing.assert_frame_equal(result, expected.sort_index())
+
+
+@pytest.mark.parametrize("window_size", [2, 5, 6])
+def test_streaming_detector_update(data, window_size):
+    # Timings of two environments arrive interleaved.
+    envs = pd.concat({"a": data, "b": data}, names=["env"])
+    envs = envs.reorder_levels(["name", "params", "env", "revision"])
+    detector = StreamingDetector(window_size=window_size)
+    events = []
+    for (name, params, env, revision), time in (
+        envs["time"].sort_index(level="revision").items()
+    ):
+        event = detector.update(name, params, env, revision, time)
+        if event is not None:
+            events.append(event)
+    result = pd.DataFrame(events).set_index(["name", "params", "env", "revision"])
+
+    expected = RollingDetector(window_size=window_size).detect_regression(envs)
+    expected = expected[expected.is_regression].sort_index()[result.columns]
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(result.sort_index(), expected)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+@pytest.mark.parametrize("window_size", [1, 2, 5, 6, 30])
+def test_rolling_detector_engine(data, engine, window_size):
+    if engine == "numba":
+        pytest.importorskip("numba")
+    rng = np.random.default_rng(2)
+    n = 2000
+    random_data = pd.DataFrame(
+        {
+            "name": rng.choice(["a", "b", "c"], n),
+            "params": rng.choice(["", "x=1", "x=2"], n),
+            "revision": rng.permutation(n),
+            "time": np.where(rng.random(n) < 0.05, np.nan, rng.random(n)),
+        }
+    ).set_index(["name", "params", "revision"])
+
+    for df in [data, random_data]:
+        detector = RollingDetector(window_size=window_size, engine=engine)
+        result = detector.detect_regression(df)
+        expected = RollingDetector(window_size=window_size).detect_regression(df)
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "numba"])
+def test_pelt_detector(data, engine):
+    if engine == "numba":
+        pytest.importorskip("numba")
+    result = PeltDetector(engine=engine).detect_regression(data)
+    expected = RollingDetector(window_size=5).detect_regression(data)
+    assert result.columns.tolist() == expected.columns.tolist()
+    pd.testing.assert_index_equal(
+        result[result.is_regression].index.sort_values(),
+        expected[expected.is_regression].index.sort_values(),
+    )
+
+
+def test_pelt_detector_step():
+    rng = np.random.default_rng(3)
+    times = np.concatenate([rng.normal(1.0, 0.01, 50), rng.normal(1.2, 0.01, 50)])
+    # A single slow timing is not a change point.
+    times[20] = 2.0
+    data = pd.DataFrame(
+        {"name": "a", "params": "", "revision": np.arange(100), "time": times}
+    ).set_index(["name", "params", "revision"])
+    result = PeltDetector().detect_regression(data)
+    assert result.index[result.is_regression].tolist() == [("a", "", 50)]
+    assert result["established_best"].iloc[0] == pytest.approx(1.0, rel=0.01)
+    assert result["established_best"].iloc[-1] == pytest.approx(1.2, rel=0.01)
+
+
+def test_pelt_detector_engines():
+    pytest.importorskip("numba")
+    rng = np.random.default_rng(4)
+    n = 2000
+    data = pd.DataFrame(
+        {
+            "name": rng.choice(["a", "b", "c"], n),
+            "params": rng.choice(["", "x=1", "x=2"], n),
+            "revision": rng.permutation(n),
+            "time": np.where(rng.random(n) < 0.05, np.nan, rng.random(n) + 1),
+        }
+    ).set_index(["name", "params", "revision"])
+    result = PeltDetector(engine="numba").detect_regression(data)
+    expected = PeltDetector(engine="numpy").detect_regression(data)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_process_benchmarks_detector():
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    result = process_benchmarks(
+        benchmark_path, window_size=5, detector=PeltDetector(engine="numpy")
+    )
+    expected = process_benchmarks(benchmark_path, window_size=5)
+    pd.testing.assert_index_equal(
+        result.index[result.is_regression], expected.index[expected.is_regression]
+    )
+
+
+@pytest.mark.parametrize("engine", ["pandas", "numpy", "numba"])
+def test_rolling_detector_spread(data, engine):
+    if engine == "numba":
+        pytest.importorskip("numba")
+    detector = RollingDetector(window_size=5, engine=engine)
+    expected = detector.detect_regression(data)
+    assert expected.is_regression.any()
+
+    # Precise samples keep the default tolerance.
+    result = detector.detect_regression(data.assign(spread=0.01))
+    pd.testing.assert_series_equal(result.is_regression, expected.is_regression)
+
+    # The regressions are within the noise of samples spread this widely.
+    noisy = data.index.get_level_values("params") != "x=0.001"
+    result = detector.detect_regression(data.assign(spread=np.where(noisy, 2.0, 0.0)))
+    regressions = result.index[result.is_regression]
+    assert len(regressions) > 0
+    assert (regressions.get_level_values("params") == "x=0.001").all()
+
+
+def test_pelt_detector_spread(data):
+    detector = PeltDetector(engine="numpy")
+    assert detector.detect_regression(data).is_regression.any()
+    result = detector.detect_regression(data.assign(spread=2.0))
+    assert not result.is_regression.any()
@@ -0,0 +1,33 @@
+import numpy as np
+
+from asv_watcher._core.downsample import downsample, lttb
+
+
+def test_lttb():
+    rng = np.random.default_rng(0)
+    x = np.arange(10_000)
+    y = rng.random(10_000)
+    y[5_000] = 100.0
+    result = lttb(x, y, 100)
+    assert len(result) == 100
+    assert result[0] == 0 and result[-1] == 9_999
+    assert (np.diff(result) > 0).all()
+    assert 5_000 in result
+
+    np.testing.assert_array_equal(lttb(x[:50], y[:50], 100), np.arange(50))
+
+
+def test_downsample():
+    rng = np.random.default_rng(0)
+    x = np.arange(10_000)
+    y = rng.random(10_000)
+    keep = np.zeros(10_000, dtype=bool)
+    keep[[10, 2_000, 7_777]] = True
+
+    result = downsample(x, y, 100, keep=keep)
+    assert {10, 2_000, 7_777} <= set(result)
+    assert len(result) <= 103
+
+    # Zoomed in, every point in range and one on either side is selected.
+    result = downsample(x, y, 100, keep=keep, x_range=(1_990.5, 2_010.5))
+    np.testing.assert_array_equal(result, np.arange(1_990, 2_012))
@@ -1,10 +1,21 @@
+import json
 import os
+import shutil
+import subprocess
+import sys
 from pathlib import Path
 
 import pandas as pd
 import pytest
 
-from asv_watcher._core.update_data import process_benchmarks
+from asv_watcher import Watcher
+from asv_watcher._core.cache import read_manifest
+from asv_watcher._core.update_data import (
+    graph_prefix,
+    process_benchmarks,
+    run,
+    update_benchmarks,
+)
 
 
 @pytest.mark.parametrize("window_size", [5, 6])
@@ -21,8 +32,393 @@ def test_end_to_end(window_size):
                 "benchmarks.BenchmarkWithParameter.time_standard_regression_parametrized",
             ],
             "params": ["", "", "x=0.001", "x=0.002"],
+            "env": pd.Categorical(["machine=richard-thinkpad"] * 4),
             "date": pd.to_datetime("2023-01-29 02:14:40", utc=True),
             "revision": [12, 22, 22, 22],
         }
-    ).set_index(["name", "params", "revision"])
+    ).set_index(["name", "params", "env", "revision"])
     pd.testing.assert_frame_equal(result, expected)
+
+
+def write_statistics(benchmark_path, spread):
+    # Write asv results with samples spread by spread(revision) around 1.
+    with open(benchmark_path / "index.json") as f:
+        index_data = json.load(f)
+    params = {
+        key: value
+        for key, value in index_data["graph_param_list"][0].items()
+        if key != "branch"
+    }
+    machine_path = benchmark_path / "results" / params["machine"]
+    os.makedirs(machine_path)
+    columns = ["result", "params", "version", "stats_q_25", "stats_q_75"]
+    for revision, commit_hash in index_data["revision_to_hash"].items():
+        half = spread(int(revision)) / 2
+        results = {
+            "commit_hash": commit_hash,
+            "params": params,
+            "result_columns": columns,
+            "results": {
+                name: [[1.0], [], "", [1 - half], [1 + half]]
+                for name in index_data["benchmarks"]
+                if "Parameter" not in name
+            },
+        }
+        with open(machine_path / f"{commit_hash[:8]}-py3.8.json", "w") as f:
+            json.dump(results, f)
+
+
+@pytest.mark.parametrize("statistics", [False, True])
+@pytest.mark.parametrize("window_size", [2, 5])
+@pytest.mark.parametrize("n_initial", [5, 25])
+def test_incremental(tmp_path, window_size, n_initial, statistics):
+    data_path = Path(os.path.dirname(__file__)) / "data"
+    benchmark_path = tmp_path / "data"
+
+    def copy_data():
+        shutil.rmtree(benchmark_path, ignore_errors=True)
+        shutil.copytree(data_path, benchmark_path)
+        if statistics:
+            # Early revisions are noisy, enough to hide the regressions when
+            # the noise of the whole series is taken into account.
+            write_statistics(benchmark_path, lambda revision: 0.6 * (revision < 23))
+
+    copy_data()
+    graph_paths = [
+        path
+        for path in (benchmark_path / "graphs").glob("**/*.json")
+        if "summary" not in str(path)
+    ]
+    for path in graph_paths:
+        with open(path) as f:
+            graph_data = json.load(f)
+        with open(path, "w") as f:
+            json.dump(graph_data[:n_initial], f)
+
+    previous, manifest = update_benchmarks(
+        benchmark_path, window_size, statistics=statistics
+    )
+    copy_data()
+    result, _ = update_benchmarks(
+        benchmark_path, window_size, previous, manifest, statistics=statistics
+    )
+
+    expected, _ = update_benchmarks(benchmark_path, window_size, statistics=statistics)
+    pd.testing.assert_frame_equal(result, expected)
+    if not statistics:
+        pd.testing.assert_frame_equal(
+            result, process_benchmarks(data_path, window_size=window_size)
+        )
+
+
+@pytest.mark.parametrize("window_size", [2, 5])
+def test_incremental_backfill(tmp_path, window_size):
+    data_path = Path(os.path.dirname(__file__)) / "data"
+    benchmark_path = tmp_path / "data"
+    shutil.copytree(data_path, benchmark_path)
+    graph_paths = [
+        path
+        for path in (benchmark_path / "graphs").glob("**/*.json")
+        if "summary" not in str(path)
+    ]
+    # Revision 5 is only benchmarked after the first run.
+    for path in graph_paths:
+        with open(path) as f:
+            graph_data = json.load(f)
+        with open(path, "w") as f:
+            json.dump([e for e in graph_data if e[0] != 5], f)
+
+    previous, manifest = update_benchmarks(benchmark_path, window_size)
+    shutil.rmtree(benchmark_path)
+    shutil.copytree(data_path, benchmark_path)
+    result, _ = update_benchmarks(benchmark_path, window_size, previous, manifest)
+
+    expected = process_benchmarks(data_path, window_size=window_size)
+    assert 5 in result.index.get_level_values("revision")
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_workers():
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    result = process_benchmarks(benchmark_path, window_size=5, workers=2)
+    expected = process_benchmarks(benchmark_path, window_size=5)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_workers_after_numba():
+    pytest.importorskip("numba")
+    # Forking once numba's parallel threading layer is running used to hang the
+    # interpreter on exit.
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    code = (
+        "from pathlib import Path\n"
+        "from asv_watcher import PeltDetector\n"
+        "from asv_watcher._core.update_data import process_benchmarks\n"
+        f"path = Path({str(benchmark_path)!r})\n"
+        "process_benchmarks(path, 5, detector=PeltDetector(engine='numba'))\n"
+        "process_benchmarks(path, 5, workers=2)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, timeout=120)
+
+
+def test_statistics(tmp_path):
+    data_path = Path(os.path.dirname(__file__)) / "data"
+    benchmark_path = tmp_path / "data"
+    shutil.copytree(data_path, benchmark_path)
+    with open(benchmark_path / "index.json") as f:
+        index_data = json.load(f)
+    params = {
+        key: value
+        for key, value in index_data["graph_param_list"][0].items()
+        if key != "branch"
+    }
+    machine_path = benchmark_path / "results" / params["machine"]
+    os.makedirs(machine_path)
+    columns = ["result", "params", "version", "stats_q_25", "stats_q_75"]
+    # time_standard_regression is too noisy for its regression to be significant.
+    parametrized = "benchmarks.BenchmarkWithParameter.time_standard_regression"
+    for commit_hash in index_data["revision_to_hash"].values():
+        results = {
+            "commit_hash": commit_hash,
+            "params": params,
+            "result_columns": columns,
+            "results": {
+                "benchmarks.Benchmark.time_standard_regression": [
+                    [1.0],
+                    [],
+                    "",
+                    [0.5],
+                    [2.0],
+                ],
+                f"{parametrized}_parametrized": [
+                    [1.0, 2.0],
+                    [["0.001", "0.002"]],
+                    "",
+                    [0.99, 1.98],
+                    [1.01, 2.02],
+                ],
+            },
+        }
+        with open(machine_path / f"{commit_hash[:8]}-py3.8.json", "w") as f:
+            json.dump(results, f)
+
+    result = process_benchmarks(benchmark_path, window_size=5)
+    assert "spread" not in result
+    result, manifest = update_benchmarks(benchmark_path, window_size=5, statistics=True)
+    assert manifest["statistics"]
+    assert result["spread"].dtype == "float32"
+    spread = result["spread"].groupby(["name", "params"]).max()
+    assert spread.loc["benchmarks.Benchmark.time_standard_regression", ""] == 1.5
+    assert spread.loc[
+        "benchmarks.BenchmarkWithParameter.time_standard_regression_parametrized",
+        "x=0.002",
+    ] == pytest.approx(0.02)
+    # Benchmarks missing from the results have no spread.
+    assert pd.isna(spread.loc["benchmarks.Benchmark.time_fixed_regression", ""])
+    regressions = result.index[result.is_regression].get_level_values("name")
+    assert list(regressions) == [
+        "benchmarks.Benchmark.time_fixed_regression",
+        "benchmarks.BenchmarkWithParameter.time_standard_regression_parametrized",
+        "benchmarks.BenchmarkWithParameter.time_standard_regression_parametrized",
+    ]
+
+
+def test_multiple_environments(tmp_path):
+    data_path = Path(os.path.dirname(__file__)) / "data"
+    benchmark_path = tmp_path / "data"
+    shutil.copytree(data_path, benchmark_path)
+    with open(benchmark_path / "index.json") as f:
+        index_data = json.load(f)
+    params = index_data["graph_param_list"][0]
+    prefix = benchmark_path / "graphs" / graph_prefix(params)
+    for machine in ["runner-2", "runner-3"]:
+        other = {**params, "machine": machine}
+        index_data["graph_param_list"].append(other)
+        shutil.copytree(prefix, benchmark_path / "graphs" / graph_prefix(other))
+    with open(benchmark_path / "index.json", "w") as f:
+        json.dump(index_data, f)
+
+    # runner-3 misses one regression and invents another.
+    noisy = benchmark_path / "graphs" / graph_prefix(other)
+    for name, step in [("time_fixed_regression", 0), ("time_no_regression_spike", 10)]:
+        path = noisy / f"benchmarks.Benchmark.{name}.json"
+        with open(path) as f:
+            graph_data = json.load(f)
+        graph_data = [
+            [revision, 0.001 * (1 + step * (revision >= 20))]
+            for revision, _ in graph_data
+        ]
+        with open(path, "w") as f:
+            json.dump(graph_data, f)
+
+    result = process_benchmarks(benchmark_path, window_size=5)
+    assert list(result.index.get_level_values("env").categories) == [
+        "machine=richard-thinkpad",
+        "machine=runner-2",
+        "machine=runner-3",
+    ]
+    detected = result[result.detected].reset_index()
+    regressions = result[result.is_regression].reset_index()
+    fixed = detected[detected["name"] == "benchmarks.Benchmark.time_fixed_regression"]
+    assert list(fixed["env"]) == ["machine=richard-thinkpad", "machine=runner-2"]
+    assert (fixed["agreement"] == 2 / 3).all()
+    spike = detected[
+        detected["name"] == "benchmarks.Benchmark.time_no_regression_spike"
+    ]
+    assert list(spike["env"]) == ["machine=runner-3"]
+    assert (spike["agreement"] == 1 / 3).all()
+    assert not regressions["name"].str.endswith("spike").any()
+    # The four regressions of the single environment test, in every environment.
+    assert len(regressions) == 3 * 4 - 1
+
+
+def test_run_projects(tmp_path):
+    data_path = Path(os.path.dirname(__file__)) / "data"
+    work = tmp_path / "work"
+    for project in ["alpha", "beta"]:
+        shutil.copytree(data_path, work / project)
+    for args in [("init", "-b", "main"), ("add", "."), ("commit", "-m", "initial")]:
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@test", *args],
+            cwd=work,
+            capture_output=True,
+            check=True,
+        )
+    cache_path = tmp_path / "cache"
+
+    result = run(
+        f"file://{work}",
+        write=True,
+        window_size=5,
+        workers=2,
+        cache_path=cache_path,
+    )
+    expected = process_benchmarks(data_path, window_size=5)
+    assert list(result) == ["alpha", "beta"]
+    for project, benchmarks in result.items():
+        pd.testing.assert_frame_equal(benchmarks, expected)
+        watcher = Watcher(path=cache_path / project)
+        assert watcher.project == project
+        assert len(watcher.regressions()) == expected.is_regression.sum()
+
+    git_hash = expected[expected.is_regression]["git_hash"].iloc[0]
+    report = watcher.generate_report(git_hash, "1", "author")
+    assert "https://asv-runner.github.io/asv-collection/beta/#benchmarks." in report
+    assert "https://github.com/rhshadrach/asv-watcher-test-data/compare/" in report
+
+
+def test_run_incremental(tmp_path):
+    data_path = Path(os.path.dirname(__file__)) / "data"
+    work = tmp_path / "work"
+    shutil.copytree(data_path, work / "alpha")
+    graph_paths = sorted((work / "alpha" / "graphs").glob("**/*.json"))
+    for path in graph_paths:
+        with open(path) as f:
+            graph_data = json.load(f)
+        with open(path, "w") as f:
+            json.dump(graph_data[:20], f)
+
+    def commit(message):
+        for args in [("add", "."), ("commit", "-m", message)]:
+            subprocess.run(
+                ["git", "-c", "user.name=test", "-c", "user.email=test@test", *args],
+                cwd=work,
+                capture_output=True,
+                check=True,
+            )
+
+    subprocess.run(["git", "init", "-b", "main"], cwd=work, check=True)
+    commit("initial")
+    cache_path = tmp_path / "cache"
+    options = {"window_size": 5, "incremental": True, "cache_path": cache_path}
+    run(f"file://{work}", write=True, **options)
+    manifest = read_manifest(cache_path / "alpha")
+    first = manifest["collection_commit"]
+
+    # The collection moves on twice, and the first update is not written, so
+    # the cache still reflects the first commit.
+    for path in graph_paths[: len(graph_paths) // 2]:
+        shutil.copy(data_path / path.relative_to(work / "alpha"), path)
+    commit("update")
+    run(f"file://{work}", write=False, **options)
+    assert read_manifest(cache_path / "alpha")["collection_commit"] == first
+    for path in graph_paths[len(graph_paths) // 2 :]:
+        shutil.copy(data_path / path.relative_to(work / "alpha"), path)
+    commit("update")
+    result = run(f"file://{work}", write=True, **options)
+
+    expected = process_benchmarks(data_path, window_size=5)
+    pd.testing.assert_frame_equal(result["alpha"], expected)
+    assert read_manifest(cache_path / "alpha")["collection_commit"] != first
+
+
+def test_two_environments(tmp_path):
+    data_path = Path(os.path.dirname(__file__)) / "data"
+    benchmark_path = tmp_path / "data"
+    shutil.copytree(data_path, benchmark_path)
+    with open(benchmark_path / "index.json") as f:
+        index_data = json.load(f)
+    params = index_data["graph_param_list"][0]
+    other = {**params, "machine": "runner-2"}
+    index_data["graph_param_list"].append(other)
+    with open(benchmark_path / "index.json", "w") as f:
+        json.dump(index_data, f)
+    prefix = benchmark_path / "graphs" / graph_prefix(other)
+    shutil.copytree(benchmark_path / "graphs" / graph_prefix(params), prefix)
+
+    # runner-2 alone sees a step in the spike benchmark, and skipped the
+    # revisions around the fixed regression, detecting it a revision later.
+    path = prefix / "benchmarks.Benchmark.time_no_regression_spike.json"
+    with open(path) as f:
+        graph_data = json.load(f)
+    graph_data = [
+        [revision, 0.001 * (1 + 10 * (revision >= 20))] for revision, _ in graph_data
+    ]
+    with open(path, "w") as f:
+        json.dump(graph_data, f)
+    path = prefix / "benchmarks.Benchmark.time_fixed_regression.json"
+    with open(path) as f:
+        graph_data = json.load(f)
+    with open(path, "w") as f:
+        json.dump([e for e in graph_data if e[0] not in (11, 12)], f)
+
+    result = process_benchmarks(benchmark_path, window_size=5)
+    detected = result[result.detected].reset_index()
+    spike = detected[detected["name"].str.endswith("spike")]
+    assert list(spike["env"]) == ["machine=runner-2"]
+    assert (spike["agreement"] == 0.5).all()
+    assert not spike["is_regression"].any()
+
+    fixed = detected[detected["name"].str.endswith("fixed_regression")]
+    assert list(fixed["revision"]) == [12, 13]
+    assert fixed["is_regression"].all()
+    regressions = result[result.is_regression].reset_index()
+    assert len(regressions) == 2 * 4
+
+
+def test_late_environment(tmp_path):
+    data_path = Path(os.path.dirname(__file__)) / "data"
+    benchmark_path = tmp_path / "data"
+    shutil.copytree(data_path, benchmark_path)
+    with open(benchmark_path / "index.json") as f:
+        index_data = json.load(f)
+    params = index_data["graph_param_list"][0]
+    other = {**params, "machine": "runner-2"}
+    index_data["graph_param_list"].append(other)
+    with open(benchmark_path / "index.json", "w") as f:
+        json.dump(index_data, f)
+    prefix = benchmark_path / "graphs" / graph_prefix(other)
+    shutil.copytree(benchmark_path / "graphs" / graph_prefix(params), prefix)
+
+    # runner-2 joined after the regressions, so has nothing to say about them.
+    for path in prefix.glob("benchmarks.*.json"):
+        with open(path) as f:
+            graph_data = json.load(f)
+        with open(path, "w") as f:
+            json.dump([e for e in graph_data if e[0] >= 32], f)
+
+    result = process_benchmarks(benchmark_path, window_size=5)
+    expected = process_benchmarks(data_path, window_size=5)
+    regressions = result.index[result.is_regression]
+    assert len(regressions) == 4
+    assert regressions.tolist() == expected.index[expected.is_regression].tolist()
@@ -0,0 +1,79 @@
+import json
+import os
+import stat
+import sys
+import textwrap
+
+import pytest
+
+from asv_watcher._core.github import GitHubCache, cached_gh, pull_requests
+
+FAKE_GH = """
+import json, os, re, sys
+
+with open(os.environ["FAKE_GH_LOG"], "a") as f:
+    f.write(json.dumps(sys.argv[1:]) + "\\n")
+if sys.argv[1:3] == ["api", "graphql"]:
+    query = sys.argv[4]
+    repository = {}
+    for index, sha in re.findall(r'c(\\d+): object\\(expression: "(\\w+)"\\)', query):
+        author = {"login": f"user-{sha}", "__typename": "User"}
+        if sha == "bot":
+            author = {"login": "bot", "__typename": "Bot"}
+        nodes = [
+            {"number": len(sha), "title": sha, "merged": True, "author": author},
+            {"number": 0, "title": "open", "merged": False, "author": author},
+        ]
+        repository[f"c{index}"] = {"associatedPullRequests": {"nodes": nodes}}
+    print(json.dumps({"data": {"repository": repository}}))
+elif sys.argv[1:3] == ["label", "list"]:
+    print(json.dumps([{"name": "Performance"}]))
+else:
+    sys.exit("unknown command")
+"""
+
+
+@pytest.fixture
+def fake_gh(tmp_path, monkeypatch):
+    path = tmp_path / "bin" / "gh"
+    path.parent.mkdir()
+    path.write_text(f"#!{sys.executable}\n" + textwrap.dedent(FAKE_GH))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{path.parent}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_GH_LOG", str(tmp_path / "log"))
+
+    def calls():
+        if not (tmp_path / "log").exists():
+            return []
+        with open(tmp_path / "log") as f:
+            return [json.loads(line) for line in f]
+
+    return calls
+
+
+def test_pull_requests(tmp_path, fake_gh):
+    cache = GitHubCache(tmp_path / "cache.sqlite")
+    shas = ["a", "bb", "ccc", "bot", "eeeee"]
+    result = pull_requests(shas, "owner/repo", cache, batch_size=2)
+    assert list(result) == shas
+    assert result["bb"] == [{"number": 2, "title": "bb", "authors": ["user-bb"]}]
+    assert result["bot"] == [{"number": 3, "title": "bot", "authors": []}]
+    assert len(fake_gh()) == 3
+
+    # Cached lookups are not fetched again, until they expire.
+    assert pull_requests(shas, "owner/repo", cache, batch_size=2) == result
+    assert len(fake_gh()) == 3
+    expired = GitHubCache(tmp_path / "cache.sqlite", ttl=0)
+    assert pull_requests(shas[:1], "owner/repo", expired) == {"a": result["a"]}
+    assert len(fake_gh()) == 4
+
+
+def test_cached_gh(tmp_path, fake_gh):
+    cache = GitHubCache(tmp_path / "cache.sqlite")
+    for _ in range(2):
+        result = cached_gh(cache, "label", "list", "--json", "name")
+        assert json.loads(result) == [{"name": "Performance"}]
+    assert len(fake_gh()) == 1
+
+    with pytest.raises(ValueError, match="unknown command"):
+        cached_gh(cache, "issue", "list")
@@ -0,0 +1,37 @@
+from asv_watcher._core.lru import LRUCache
+
+
+def test_lru_cache():
+    cache = LRUCache(max_entries=2, max_bytes=10)
+    cache.put("a", 1, nbytes=4)
+    cache.put("b", 2, nbytes=4)
+    assert cache.get("a") == 1
+    # "b" is the least recently used.
+    cache.put("c", 3, nbytes=4)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    # Evicts "a" to stay within max_entries, then "c" to stay within max_bytes.
+    cache.put("d", 4, nbytes=7)
+    assert cache.get("a") is None
+    assert len(cache) == 1 and cache.nbytes == 7
+    cache.put("e", 5, nbytes=11)
+    assert cache.get("e") is None
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 3,
+        "evictions": 3,
+        "entries": 1,
+        "nbytes": 7,
+    }
+
+
+def test_lru_cache_invalidate():
+    cache = LRUCache()
+    cache.invalidate(1)
+    cache.put("a", 1, nbytes=1)
+    cache.invalidate(1)
+    assert cache.get("a") == 1
+    cache.invalidate(2)
+    assert cache.get("a") is None
+    assert cache.nbytes == 0
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from asv_watcher._core import util
+from asv_watcher._core.pager import Pager
+
+
+def make_regressions():
+    rng = np.random.default_rng(0)
+    result = pd.DataFrame(
+        {
+            "name": [f"benchmarks.time_{i}" for i in range(25)],
+            "pct_change_value": rng.normal(size=25),
+            "abs_change_value": rng.normal(size=25) * 1e-3,
+            "revision": np.arange(25),
+        }
+    )
+    return result
+
+
+def test_page_sorted():
+    data = make_regressions()
+    columns = ["name", "pct_change", "abs_change", "revision"]
+    pager = Pager(data, columns)
+    sort_by = [{"column_id": "pct_change", "direction": "desc"}]
+    expected = util.display_strings(
+        data.sort_values("pct_change_value", ascending=False)
+    )[columns]
+
+    result, page_count = pager.page(1, 10, sort_by)
+    assert page_count == 3
+    assert result == expected.iloc[10:20].to_dict("records")
+
+    # Pages past the last are clamped.
+    result, _ = pager.page(5, 10, sort_by)
+    assert result == expected.iloc[20:].to_dict("records")
+
+
+def test_page_filtered():
+    data = make_regressions()
+    pager = Pager(data, ["name", "abs_change"])
+    filter_query = '{abs_change} > 0.5ms && {name} contains "time_1"'
+    mask = (data["abs_change_value"] > 0.0005) & data["name"].str.contains("time_1")
+    expected = util.display_strings(data[mask])[["name", "abs_change"]]
+
+    result, page_count = pager.page(0, 10, filter_query=filter_query)
+    assert page_count == 1
+    assert result == expected.to_dict("records")
+
+    # Conditions that cannot be parsed are ignored.
+    result, _ = pager.page(0, 100, filter_query="{abs_change} > fast")
+    assert len(result) == len(data)
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from asv_watcher._core.prefetch import PENDING, Prefetcher
+
+
+def test_prefetch():
+    started = threading.Event()
+    release = threading.Event()
+    resolved = []
+
+    def resolve(key):
+        started.set()
+        release.wait()
+        resolved.append(key)
+        if key == "error":
+            raise ValueError(key)
+        return key.upper()
+
+    prefetcher = Prefetcher(resolve)
+    prefetcher.prefetch(["a"])
+    started.wait()
+    prefetcher.prefetch(["b", "c", "a"])
+    # Requested keys are resolved before prefetched keys.
+    assert prefetcher.get("d") is PENDING
+    assert prefetcher.get("error") is PENDING
+    assert prefetcher.get("c") is PENDING
+    release.set()
+    prefetcher.close()
+
+    assert resolved == ["a", "d", "error", "c", "b"]
+    assert prefetcher.get("a") == "A"
+    assert prefetcher.get("c") == "C"
+    with pytest.raises(ValueError, match="error"):
+        prefetcher.get("error")
+
+
+def test_prefetch_retries_errors():
+    attempts = []
+
+    def resolve(key):
+        attempts.append(key)
+        if len(attempts) == 1:
+            raise ConnectionError(key)
+        return key.upper()
+
+    prefetcher = Prefetcher(resolve, error_ttl=0.2)
+    prefetcher.prefetch(["a"])
+    with pytest.raises(ConnectionError):
+        while prefetcher.get("a") is PENDING:
+            time.sleep(0.01)
+    with pytest.raises(ConnectionError):
+        prefetcher.get("a")
+    # Once expired, the error is dropped and the key resolved again.
+    time.sleep(0.2)
+    while prefetcher.get("a") is PENDING:
+        time.sleep(0.01)
+    prefetcher.close()
+    assert prefetcher.get("a") == "A"
+    assert attempts == ["a", "a"]
+
+
+def test_prefetch_clear():
+    release = threading.Event()
+    version = ["old"]
+
+    def resolve(key):
+        release.wait()
+        if key == "error":
+            raise KeyError(key)
+        return f"{key} {version[0]}"
+
+    prefetcher = Prefetcher(resolve, errors=(KeyError,))
+    prefetcher.prefetch(["a", "b"])
+    # Results of keys being resolved when cleared are dropped.
+    prefetcher.clear()
+    version[0] = "new"
+    release.set()
+    assert prefetcher.get("b") is PENDING
+    assert prefetcher.get("error") is PENDING
+    prefetcher.close()
+
+    assert prefetcher.get("b") == "b new"
+    with pytest.raises(KeyError):
+        prefetcher.get("error")
+    assert prefetcher.get("a") is PENDING
@@ -0,0 +1,94 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from asv_watcher._core.profile import (
+    NULL_PROFILER,
+    Profiler,
+    write_prometheus,
+    write_report,
+)
+from asv_watcher._core.update_data import update_benchmarks
+
+
+def test_profiler():
+    profiler = Profiler()
+    with profiler.stage("outer"):
+        profiler.count("rows", 3)
+        with profiler.stage("inner"):
+            # Large enough to be mapped, and unmapped when freed.
+            values = np.ones(2**23)
+            profiler.count("rows", 2)
+            profiler.count("rows")
+        del values
+        with profiler.stage("small"):
+            pass
+    report = profiler.report()
+
+    assert report["name"] == "run"
+    [outer] = report["children"]
+    inner, small = outer["children"]
+    assert outer["counters"] == {"rows": 3}
+    assert inner["counters"] == {"rows": 3}
+    assert inner["peak_bytes"] >= small["peak_bytes"] + 32 * 2**20
+    assert outer["peak_bytes"] >= inner["peak_bytes"]
+    assert report["peak_bytes"] >= outer["peak_bytes"]
+    assert report["seconds"] >= outer["seconds"] >= inner["seconds"] >= 0
+
+
+def test_nested_profilers():
+    outer = Profiler()
+    with outer.stage("update"):
+        values = np.ones(2**23)
+        del values
+        # E.g. update_project within run when there is a single worker.
+        inner = Profiler("project")
+        with inner.stage("parse"):
+            pass
+        outer.attach(inner.report())
+    report = outer.report()
+
+    [update] = report["children"]
+    [project] = update["children"]
+    assert update["peak_bytes"] >= project["peak_bytes"] + 32 * 2**20
+
+
+def test_null_profiler():
+    with NULL_PROFILER.stage("stage"):
+        NULL_PROFILER.count("rows", 3)
+    NULL_PROFILER.attach({})
+    assert NULL_PROFILER.report() == {}
+
+
+def test_write_report(tmp_path):
+    profiler = Profiler()
+    with profiler.stage("update"):
+        with profiler.stage("parse"):
+            profiler.count("files", 4)
+    report = profiler.report()
+
+    write_report(tmp_path / "profile.json", report)
+    assert (tmp_path / "profile.json").exists()
+    write_prometheus(tmp_path / "asv_watcher.prom", report)
+    lines = (tmp_path / "asv_watcher.prom").read_text().splitlines()
+    assert "# TYPE asv_watcher_files_total counter" in lines
+    assert 'asv_watcher_files_total{stage="run/update/parse"} 4' in lines
+    assert any(
+        line.startswith('asv_watcher_stage_seconds{stage="run"}') for line in lines
+    )
+    # The temporary file was renamed.
+    assert sorted(os.listdir(tmp_path)) == ["asv_watcher.prom", "profile.json"]
+
+
+def test_update_benchmarks_profile():
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    profiler = Profiler()
+    update_benchmarks(benchmark_path, window_size=5, profiler=profiler)
+    report = profiler.report()
+    stages = {stage["name"]: stage for stage in report["children"]}
+    assert list(stages) == ["discover", "parse", "concat", "detect", "format"]
+    assert stages["parse"]["counters"]["files"] == 4
+    assert stages["parse"]["counters"]["bytes"] > 0
+    assert stages["concat"]["counters"]["rows"] > 0
+    assert report["counters"] == {"regressions": 4}
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+
+from asv_watcher._core.reader import (
+    BACKENDS,
+    concat_graphs,
+    read_graph,
+    revisions_digest,
+)
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson", "msgspec"])
+def test_read_graph(tmp_path, backend):
+    if backend not in BACKENDS:
+        pytest.skip(f"{backend} is not installed")
+    path = tmp_path / "graph.json"
+    graph_data = [[3, [1.0, None, 2.0]], [4, None], [5, [3.0, 4.0]], [6, 5.0]]
+    path.write_text(json.dumps(graph_data))
+
+    # Times beyond the number of combinations are ignored.
+    result = read_graph(path, 2, backend=backend)
+    np.testing.assert_array_equal(result.revisions, [3, 3, 5, 5, 6])
+    np.testing.assert_array_equal(result.combos, [0, 1, 0, 1, 0])
+    np.testing.assert_array_equal(result.times, [1.0, np.nan, 3.0, 4.0, 5.0])
+    assert result.last_revision == 6
+
+    result = read_graph(path, 2, last_revision=4, backend=backend)
+    np.testing.assert_array_equal(result.revisions, [5, 5, 6])
+    assert result.last_revision == 6
+
+
+def test_read_graph_backfill(tmp_path):
+    path = tmp_path / "graph.json"
+    path.write_text(json.dumps([[3, 1.0], [5, 2.0]]))
+    first = read_graph(path, 1)
+    assert first.digest == revisions_digest(np.array([3, 5]))
+
+    path.write_text(json.dumps([[3, 1.0], [5, 2.0], [6, 3.0]]))
+    result = read_graph(path, 1, first.last_revision, digest=first.digest)
+    np.testing.assert_array_equal(result.revisions, [6])
+    # A timing of an earlier revision was added, so every revision is read.
+    path.write_text(json.dumps([[3, 1.0], [4, 1.5], [5, 2.0], [6, 3.0]]))
+    result = read_graph(path, 1, first.last_revision, digest=first.digest)
+    np.testing.assert_array_equal(result.revisions, [3, 4, 5, 6])
+    assert result.digest == revisions_digest(np.array([6, 5, 4, 3]))
+
+
+def test_read_graph_empty(tmp_path):
+    path = tmp_path / "graph.json"
+    path.write_text("[]")
+    result = read_graph(path, 1)
+    assert len(result.times) == 0 and result.last_revision is None
+    with pytest.raises(ValueError, match="Unavailable JSON backend"):
+        read_graph(path, 1, backend="unknown")
+
+
+def test_concat_graphs(tmp_path):
+    paths = [tmp_path / "a.json", tmp_path / "b.json"]
+    paths[0].write_text("[[1, 1.0], [2, 2.0]]")
+    paths[1].write_text("[[3, 3.0]]")
+    result = concat_graphs([read_graph(path, 1) for path in paths])
+    np.testing.assert_array_equal(result.revisions, [1, 2, 3])
+    np.testing.assert_array_equal(result.times, [1.0, 2.0, 3.0])
+    assert result.last_revision == 3
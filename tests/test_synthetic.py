@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+import pytest
+
+from asv_watcher._core.synthetic import generate_collection
+from asv_watcher._core.update_data import process_benchmarks
+
+
+@pytest.mark.parametrize("param_sizes", [(), (2, 3)])
+def test_generate_collection(tmp_path, param_sizes):
+    expected = generate_collection(
+        tmp_path,
+        n_benchmarks=20,
+        param_sizes=param_sizes,
+        n_machines=2,
+        n_revisions=200,
+        regression_rate=0.2,
+        noise=0.001,
+        missing=0.05,
+    )
+    with open(tmp_path / "index.json") as f:
+        index_data = json.load(f)
+    assert len(index_data["benchmarks"]) == 20
+    assert len(index_data["revision_to_hash"]) == 200
+    assert len(expected) > 0
+
+    result = process_benchmarks(tmp_path, window_size=5)
+    n_combos = int(np.prod(param_sizes))
+    # Missing timings are dropped.
+    assert 0.9 < len(result) / (20 * n_combos * 2 * 200) < 0.99
+    assert list(result.index.get_level_values("env").categories) == [
+        "machine=runner-0",
+        "machine=runner-1",
+    ]
+    # Each regression is found on both machines, give or take a couple of
+    # revisions for timings missing around the step.
+    regressions = result[result.is_regression].reset_index()
+    matches = expected.reset_index().merge(
+        regressions, on=["name", "params"], suffixes=("", "_found")
+    )
+    matches = matches[(matches["revision_found"] - matches["revision"]).abs() <= 2]
+    found = matches.groupby(["name", "params", "revision"])["env"].nunique()
+    assert len(found) >= 0.9 * len(expected)
+    assert (found == 2).mean() >= 0.9
+    assert len(regressions) <= 1.1 * 2 * len(expected)
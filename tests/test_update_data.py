@@ -0,0 +1,158 @@
+import itertools as it
+import os
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from asv_watcher._core.parameters import ParameterCollection
+from asv_watcher._core.update_data import (
+    collection_changes,
+    determine_benchmark_prefixes,
+    environment_names,
+    extract_benchmark_data,
+    graph_prefix,
+    make_param_string,
+    read_index_data,
+    sync_collection,
+)
+
+
+def test_extract_benchmark_data():
+    parameter_collection = ParameterCollection(["x", "y"], [["1", "2"], ["a"]])
+    json_data = [[3, [0.5, None]], [4, None], [5, [1.5, 2.5]]]
+    revision_to_date = {"3": 1674873876000}
+    index_data = {"revision_to_hash": {"3": "h3", "5": "h5"}}
+    result = extract_benchmark_data(
+        json_data, parameter_collection, revision_to_date, index_data
+    )
+    expected = pd.DataFrame(
+        {
+            "params": ["x=1; y=a", "x=2; y=a", "x=1; y=a", "x=2; y=a"],
+            "revision": np.array([3, 3, 5, 5], dtype=np.int64),
+            "date": pd.to_datetime(
+                ["2023-01-28 02:44:36", "2023-01-28 02:44:36", None, None], utc=True
+            ).as_unit("us"),
+            "time": [0.5, np.nan, 1.5, 2.5],
+            "commit_hash": ["h3", "h3", "h5", "h5"],
+        }
+    )
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_param_strings():
+    names, values = ["x", "y", "z"], [["1", "2"], ["a", "b", "c"], ["'s'"]]
+    parameter_collection = ParameterCollection(names, values)
+    expected = [make_param_string(names, combo) for combo in it.product(*values)]
+    assert parameter_collection.param_strings().tolist() == expected
+    assert parameter_collection.param_strings(2, 4).tolist() == expected[2:4]
+    assert parameter_collection.codes(1, np.arange(6)).tolist() == [0, 1, 2, 0, 1, 2]
+    assert parameter_collection[4].to_dict() == {"x": "2", "y": "b", "z": "'s'"}
+    assert parameter_collection[-1].to_dict() == {"x": "2", "y": "c", "z": "'s'"}
+    for index in [6, -7]:
+        with pytest.raises(IndexError):
+            parameter_collection[index]
+    # Iteration stops at the end through IndexError.
+    assert len(list(parameter_collection)) == 6
+
+
+def test_determine_benchmark_prefixes():
+    benchmark_path = Path(os.path.dirname(__file__)) / "data"
+    index_data = read_index_data(benchmark_path)
+    result = determine_benchmark_prefixes(benchmark_path, index_data)
+    expected = {
+        path.parent
+        for path in (benchmark_path / "graphs").glob("**/*.json")
+        if "summary" not in str(path)
+    }
+    assert set(result) == expected
+    assert all(len(filenames) == 5 for filenames in result.values())
+
+
+def test_graph_prefix():
+    result = graph_prefix({"python": "3.10", "branch": "", "numpy": None, "os": "a/b"})
+    assert result == os.path.join("branch", "numpy-null", "os-a_b", "python-3.10")
+
+
+def test_environment_names():
+    graph_param_list = [
+        {"machine": "a", "python": "3.10", "os": "linux"},
+        {"machine": "a", "python": "3.11", "os": "linux"},
+        {"machine": "b", "python": "3.11", "os": "linux"},
+    ]
+    result = environment_names(graph_param_list)
+    expected = [
+        "machine=a; python=3.10",
+        "machine=a; python=3.11",
+        "machine=b; python=3.11",
+    ]
+    assert result == expected
+    assert environment_names(graph_param_list[:1]) == ["machine=a"]
+
+
+def test_sync_collection(tmp_path):
+    def git(*args, cwd=tmp_path / "work"):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@test", *args],
+            cwd=cwd,
+            capture_output=True,
+            check=True,
+        )
+
+    work = tmp_path / "work"
+    for filename in ["pandas/index.json", "pandas/graphs/a.json", "numpy/index.json"]:
+        os.makedirs((work / filename).parent, exist_ok=True)
+        (work / filename).write_text("[]")
+    git("init", "-b", "main")
+    git("add", ".")
+    git("commit", "-m", "initial")
+    git("clone", "--bare", str(work), str(tmp_path / "remote.git"), cwd=tmp_path)
+    url = f"file://{tmp_path / 'remote.git'}"
+
+    mirror = tmp_path / "mirror"
+    projects, first = sync_collection(url, mirror, ["pandas"])
+    assert projects == ["pandas"]
+    assert (mirror / "pandas" / "graphs" / "a.json").exists()
+    assert not (mirror / "numpy").exists()
+    assert collection_changes(mirror, "pandas", None, first) is None
+
+    (work / "pandas" / "graphs" / "a.json").write_text("[[1, 1.0]]")
+    (work / "pandas" / "graphs" / "b.json").write_text("[]")
+    (work / "numpy" / "index.json").write_text("{}")
+    git("add", ".")
+    git("commit", "-m", "update")
+    git("push", str(tmp_path / "remote.git"), "main")
+
+    projects, second = sync_collection(url, mirror, ["pandas"])
+    assert collection_changes(mirror, "pandas", first, second) == {
+        "graphs/a.json",
+        "graphs/b.json",
+    }
+    assert (mirror / "pandas" / "graphs" / "a.json").read_text() == "[[1, 1.0]]"
+    assert not (mirror / "numpy").exists()
+    assert sync_collection(url, mirror, ["pandas"]) == (["pandas"], second)
+    assert collection_changes(mirror, "pandas", second, second) == set()
+
+    # Changes accumulate from the commit a cache was built from, however many
+    # times the mirror moved since; unusual names are not quoted.
+    (work / "pandas" / "graphs" / "é b.json").write_text("[]")
+    git("add", ".")
+    git("commit", "-m", "unicode")
+    git("push", str(tmp_path / "remote.git"), "main")
+    _, third = sync_collection(url, mirror, ["pandas"])
+    assert collection_changes(mirror, "pandas", first, third) == {
+        "graphs/a.json",
+        "graphs/b.json",
+        "graphs/é b.json",
+    }
+    assert collection_changes(mirror, "pandas", second, third) == {"graphs/é b.json"}
+    assert collection_changes(mirror, "pandas", "0" * 40, third) is None
+
+    # Projects default to all those in the collection.
+    projects, _ = sync_collection(url, mirror)
+    assert projects == ["numpy", "pandas"]
+    assert (mirror / "numpy" / "index.json").exists()
+    with pytest.raises(ValueError, match="not in the collection: scipy"):
+        sync_collection(url, mirror, ["pandas", "scipy"])
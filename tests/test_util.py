@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from asv_watcher._core import util
+
+
+def test_times_to_str():
+    rng = np.random.default_rng(0)
+    values = np.concatenate(
+        [
+            rng.normal(size=1000) * 10.0 ** rng.integers(-12, 6, 1000),
+            [0.0, -0.0, 1.0, 0.001, 1e-6, 0.0125, 1e15, np.nan, np.inf, -np.inf],
+        ]
+    )
+    result = util.times_to_str(values)
+    expected = np.array([util.time_to_str(x) for x in values], dtype=object)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_percents_to_str():
+    rng = np.random.default_rng(0)
+    values = np.concatenate(
+        [rng.normal(size=1000), [0.0, -0.0, 0.000125, np.nan, np.inf, -np.inf]]
+    )
+    result = util.percents_to_str(values)
+    expected = np.array([f"{x:0.3%}" for x in values], dtype=object)
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_format_benchmarks_without_strings():
+    data = pd.DataFrame({"time": [1.5, 0.002], "pct_change": [0.1, -0.25]})
+    result = util.format_benchmarks(data.copy(), strings=False)
+    assert list(result.columns) == ["pct_change_value", "time_value"]
+
+    result = util.display_strings(result)
+    expected = util.format_benchmarks(data.copy())
+    pd.testing.assert_frame_equal(result[expected.columns], expected)
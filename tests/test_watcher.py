@@ -1,4 +1,5 @@
 import pandas as pd
+import pytest
 
 from asv_watcher import Watcher
 
@@ -18,3 +19,21 @@ def test_commit_range():
     expected = "a1...a2"
     result = watcher.commit_range(git_hash="a2")
     assert result == expected, f"{result=} vs {expected=}"
+
+
+def test_commit_range_errors():
+    watcher = Watcher.__new__(Watcher)
+    watcher._data = pd.DataFrame(
+        {
+            "name": "benchmark",
+            "params": "",
+            "revision": [0, 1, 2],
+            "git_hash": ["a0", "a1", "a2"],
+            "is_regression": [True, False, True],
+        }
+    ).set_index(["name", "params", "revision"])
+    watcher._regressions = watcher._data[watcher._data.is_regression]
+    with pytest.raises(ValueError, match="No regressions found for a1"):
+        watcher.commit_range(git_hash="a1")
+    with pytest.raises(ValueError, match="No benchmarked commit precedes a0"):
+        watcher.commit_range(git_hash="a0")